@@ -0,0 +1,225 @@
+import argparse
+import asyncio
+import collections
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_discord import FakeAPI, FakeBot, FakeGuild, FakeInteraction  # noqa: E402
+from cogs.logs import get_ticket_logs  # noqa: E402
+from cogs.tickets import (ClaimTicketButton, CloseTicketButton, ReleaseTicketButton, TicketDropdown,  # noqa: E402
+                          TicketSystem)
+from utils.assignment import STRATEGIES  # noqa: E402
+from utils.guild_config import GuildConfigs  # noqa: E402
+from utils.members import MemberCache  # noqa: E402
+from utils.settings import Settings  # noqa: E402
+from utils.storage import TicketStore  # noqa: E402
+from utils.transcripts import TranscriptArchiver  # noqa: E402
+
+FLOWS = ("open", "claim", "release", "close")
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            total += os.path.getsize(os.path.join(root, file))
+    return total
+
+
+async def timed(latencies, flow, coro):
+    start = time.perf_counter()
+    await coro
+    latencies[flow].append(time.perf_counter() - start)
+
+
+async def ticket_lifecycle(bot, api, guild, user, staff, category, latencies, assignments, clicks=1):
+    dropdown = TicketDropdown(
+        bot, None, bot.guild_configs.get(guild.id).ticket_categories)
+    dropdown._values = [category]
+    await asyncio.gather(*(timed(latencies, "open", dropdown.callback(FakeInteraction(api, user, guild)))
+                           for _ in range(clicks)))
+
+    ticket = bot.ticket_store.get_open_by_opener(guild.id, user.id)
+    if ticket is None:
+        return
+    channel = guild.channels[ticket.channel_id]
+    message = channel.messages[0]
+    flows = ("claim", "release")
+    if ticket.claimed_by is not None:
+        # Con reparto automático el ticket llega reclamado: quien lo tiene lo libera y lo vuelve a reclamar.
+        assignments[ticket.claimed_by] += 1
+        staff = guild.get_member(ticket.claimed_by)
+        flows = ("release", "claim")
+    for flow in flows:
+        interaction = FakeInteraction(api, staff, guild, channel, message)
+        button = ClaimTicketButton(bot) if flow == "claim" else ReleaseTicketButton(bot)
+        await timed(latencies, flow, button.callback(interaction))
+    interaction = FakeInteraction(api, staff, guild, channel, message)
+    await timed(latencies, "close", CloseTicketButton(bot).callback(interaction))
+
+
+async def run(args, workdir):
+    settings = Settings()
+    api = FakeAPI(latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+                  rate_limits=not args.no_rate_limits)
+    config = settings.config
+    if args.auto_assign:
+        config = dict(config, ticket_categories={
+            category: dict(category_data, auto_assign=args.auto_assign)
+            for category, category_data in config.get("ticket_categories", {}).items()})
+    guilds = [FakeGuild(api, config.get("ticket_categories", {}))
+              for _ in range(args.guilds)]
+    bot = FakeBot(api, guilds, settings.catalogs[args.language])
+    bot.settings = settings
+    bot.launch_time = time.perf_counter()
+    bot.member_cache = MemberCache()
+    bot.ticket_store = TicketStore(os.path.join(workdir, "tickets.db"),
+                                   debounce=args.debounce_ms / 1000)
+    bot.guild_configs = GuildConfigs(
+        config, directory=os.path.join(workdir, "guilds"))
+    for guild in guilds:
+        log_channel = await guild.create_text_channel("logs")
+        bot.guild_configs.update(guild.id, log_channel_id=str(log_channel.id))
+    ticket_logs = get_ticket_logs(bot)
+    ticket_logs.spill_file = os.path.join(workdir, "logs_spill.jsonl")
+    ticket_system = TicketSystem(bot)
+    ticket_system.close_delay = 0
+    ticket_system.transcripts = TranscriptArchiver(
+        bot.ticket_store, directory=os.path.join(workdir, "transcripts"))
+
+    categories = list(config.get("ticket_categories", {}))
+    staff = {guild.id: guild.add_member("staff", administrator=True)
+             for guild in guilds}
+    for guild in guilds:
+        for i in range(args.staff):
+            guild.add_member(f"support{i}", roles=list(guild.roles.values()))
+    assignments = collections.Counter()
+    users = [guilds[i % len(guilds)].add_member(f"user{i}")
+             for i in range(args.users)]
+    api.calls.clear()
+    latencies = {flow: [] for flow in FLOWS}
+
+    start = time.perf_counter()
+    await asyncio.gather(*(ticket_lifecycle(bot, api, user.guild, user, staff[user.guild.id],
+                                            categories[i % len(categories)], latencies, assignments, args.clicks)
+                           for i, user in enumerate(users)))
+    await bot.ticket_store.flush()
+    await ticket_logs.close()
+    wall = time.perf_counter() - start
+
+    api_calls = sum(api.calls.values())
+    tickets = api.calls["POST /guilds/{guild_id}/channels"]
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "parameters": vars(args),
+        "wall_seconds": wall,
+        "tickets": tickets,
+        "duplicate_channels": tickets - len(users),
+        "admission": ticket_system.admission.stats(),
+        "assignment": dict(ticket_system.assignment.stats(),
+                           min_per_staff=min(assignments.values(), default=0),
+                           max_per_staff=max(assignments.values(), default=0)),
+        "flows": {
+            flow: {
+                "count": len(values),
+                "p50_ms": percentile(values, 0.50) * 1000,
+                "p99_ms": percentile(values, 0.99) * 1000,
+                "max_ms": max(values, default=0.0) * 1000,
+            } for flow, values in latencies.items()
+        },
+        "api": {
+            "calls": api_calls,
+            "calls_per_ticket": api_calls / tickets if tickets else 0.0,
+            "by_route": dict(api.calls),
+            "rate_limited": dict(api.rate_limited),
+            "rate_limit_wait_seconds": api.rate_limit_wait,
+        },
+        "persistence": dict(bot.ticket_store.worker.stats(),
+                            bytes_on_disk=directory_size(workdir)),
+        "logs": ticket_logs.stats(),
+    }
+
+
+def compare(previous, current):
+    print(f"{'métrica':<28}{'anterior':>12}{'actual':>12}{'cambio':>10}")
+    rows = [(f"{flow} p50 ms", previous["flows"][flow]["p50_ms"], current["flows"][flow]["p50_ms"])
+            for flow in FLOWS]
+    rows += [(f"{flow} p99 ms", previous["flows"][flow]["p99_ms"], current["flows"][flow]["p99_ms"])
+             for flow in FLOWS]
+    rows += [
+        ("llamadas API por ticket",
+         previous["api"]["calls_per_ticket"], current["api"]["calls_per_ticket"]),
+        ("bytes en disco", previous["persistence"]["bytes_on_disk"],
+         current["persistence"]["bytes_on_disk"]),
+        ("memoria pico MiB", previous["peak_memory_mib"],
+         current["peak_memory_mib"]),
+    ]
+    for name, before, after in rows:
+        change = f"{(after - before) / before * 100:+.1f}%" if before else "-"
+        print(f"{name:<28}{before:>12.2f}{after:>12.2f}{change:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark offline de los flujos de tickets")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--guilds", type=int, default=1,
+                        help="servidores entre los que se reparten los usuarios")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--debounce-ms", type=float, default=50)
+    parser.add_argument("--no-rate-limits", action="store_true")
+    parser.add_argument("--clicks", type=int, default=1,
+                        help="clics simultáneos de cada usuario al abrir su ticket")
+    parser.add_argument("--auto-assign", choices=STRATEGIES,
+                        help="activa el reparto automático en todas las categorías")
+    parser.add_argument("--staff", type=int, default=5,
+                        help="miembros con el rol de soporte en cada servidor")
+    parser.add_argument("--language", default="ES_es")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", metavar="RESULTADOS_ANTERIORES")
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    with tempfile.TemporaryDirectory() as workdir:
+        results = asyncio.run(run(args, workdir))
+    results["peak_memory_mib"] = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+
+    with open(args.output, 'w', encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+
+    for flow, stats in results["flows"].items():
+        print(f"{flow:<8} n={stats['count']:<6} p50={stats['p50_ms']:.1f} ms  p99={stats['p99_ms']:.1f} ms")
+    print(f"Canales creados: {results['tickets']} (duplicados: {results['duplicate_channels']})")
+    if args.auto_assign:
+        assignment = results["assignment"]
+        print(f"Reparto automático: {assignment['assigned']} asignados, {assignment['queued']} en espera, "
+              f"{assignment['min_per_staff']}-{assignment['max_per_staff']} tickets por miembro del staff")
+    print(f"Llamadas API por ticket: {results['api']['calls_per_ticket']:.2f} "
+          f"(esperas por rate limit: {results['api']['rate_limit_wait_seconds']:.1f}s)")
+    print(f"Bytes en disco: {results['persistence']['bytes_on_disk']}  "
+          f"Memoria pico: {results['peak_memory_mib']:.1f} MiB  Tiempo total: {results['wall_seconds']:.1f}s")
+    print(f"📄 Resultados guardados en {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
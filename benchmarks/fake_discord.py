@@ -0,0 +1,305 @@
+import asyncio
+import collections
+import itertools
+import random
+from datetime import datetime, timezone
+import discord
+
+# (peticiones, segundos) por bucket; aproximan los límites publicados por Discord.
+ROUTE_LIMITS = {
+    "POST /guilds/{guild_id}/channels": (10, 10.0),
+    "DELETE /channels/{channel_id}": (5, 1.0),
+    "PUT /channels/{channel_id}/permissions/{overwrite_id}": (10, 10.0),
+    "POST /channels/{channel_id}/messages": (5, 5.0),
+    "PATCH /channels/{channel_id}/messages/{message_id}": (5, 5.0),
+    "GET /channels/{channel_id}/messages": (5, 1.0),
+    "GET /guilds/{guild_id}/members/{user_id}": (10, 1.0),
+    "POST /interactions/{interaction_id}/{interaction_token}/callback": (None, None),
+    "POST /webhooks/{application_id}/{interaction_token}": (5, 5.0),
+}
+
+_snowflakes = itertools.count(discord.utils.time_snowflake(datetime.now(timezone.utc)))
+
+
+def next_snowflake():
+    return next(_snowflakes) << 1
+
+
+class FakeAPI:
+    def __init__(self, latency=0.05, jitter=0.02, rate_limits=True):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limits = rate_limits
+        self.calls = collections.Counter()
+        self.rate_limited = collections.Counter()
+        self.rate_limit_wait = 0.0
+        self._windows = collections.defaultdict(collections.deque)
+
+    async def request(self, route, major_id=None):
+        loop = asyncio.get_running_loop()
+        limit, per = ROUTE_LIMITS.get(route, (None, None))
+        if self.rate_limits and limit:
+            window = self._windows[(route, major_id)]
+            while True:
+                now = loop.time()
+                while window and now - window[0] >= per:
+                    window.popleft()
+                if len(window) < limit:
+                    break
+                # Igual que discord.py: se espera a que se libere el bucket en lugar de fallar.
+                wait = per - (now - window[0])
+                self.rate_limited[route] += 1
+                self.rate_limit_wait += wait
+                await asyncio.sleep(wait)
+            window.append(loop.time())
+        self.calls[route] += 1
+        await asyncio.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+
+
+class FakeRole:
+    def __init__(self, role_id, name):
+        self.id = role_id
+        self.name = name
+        self.mention = f"<@&{role_id}>"
+        self.members = []
+
+
+class FakeMember:
+    def __init__(self, guild, member_id, name, administrator=False, bot=False, roles=()):
+        self.guild = guild
+        self.id = member_id
+        self.name = name
+        self.display_name = name
+        self.bot = bot
+        self.mention = f"<@{member_id}>"
+        self.roles = list(roles)
+        self.status = discord.Status.online
+        self.guild_permissions = discord.Permissions.all(
+        ) if administrator else discord.Permissions.none()
+
+    def get_role(self, role_id):
+        return discord.utils.get(self.roles, id=role_id)
+
+    def __str__(self):
+        return self.name
+
+
+class FakeCategory:
+    def __init__(self, category_id, name):
+        self.id = category_id
+        self.name = name
+
+
+class FakeMessage:
+    def __init__(self, api, channel, author, content=None, embeds=(), view=None):
+        self.api = api
+        self.id = next_snowflake()
+        self.channel = channel
+        self.author = author
+        self.content = content or ""
+        self.embeds = list(embeds)
+        self.view = view
+        self.attachments = []
+        self.created_at = datetime.now(timezone.utc)
+
+    async def edit(self, **fields):
+        await self.api.request("PATCH /channels/{channel_id}/messages/{message_id}", self.channel.id)
+        self.view = fields.get("view", self.view)
+
+
+class FakeTextChannel:
+    def __init__(self, api, guild, name, category=None, overwrites=None):
+        self.api = api
+        self.guild = guild
+        self.id = next_snowflake()
+        self.name = name
+        self.category = category
+        self.category_id = category.id if category else None
+        self.overwrites = dict(overwrites or {})
+        self.mention = f"<#{self.id}>"
+        self.created_at = datetime.now(timezone.utc)
+        self.messages = []
+
+    @property
+    def last_message_id(self):
+        return self.messages[-1].id if self.messages else None
+
+    async def send(self, content=None, embed=None, embeds=None, view=None):
+        await self.api.request("POST /channels/{channel_id}/messages", self.id)
+        message = FakeMessage(self.api, self, self.guild.me, content,
+                              embeds or ([embed] if embed else []), view)
+        self.messages.append(message)
+        return message
+
+    async def set_permissions(self, target, **permissions):
+        await self.api.request("PUT /channels/{channel_id}/permissions/{overwrite_id}", self.id)
+        self.overwrites[target] = discord.PermissionOverwrite(**permissions)
+
+    async def delete(self):
+        await self.api.request("DELETE /channels/{channel_id}", self.id)
+        self.guild.channels.pop(self.id, None)
+
+    async def purge(self, limit=100):
+        await self.api.request("GET /channels/{channel_id}/messages", self.id)
+        deleted = self.messages[-limit:]
+        del self.messages[-limit:]
+        return deleted
+
+    async def history(self, limit=None, oldest_first=False):
+        messages = self.messages if oldest_first else list(reversed(self.messages))
+        for start in range(0, len(messages), 100):
+            await self.api.request("GET /channels/{channel_id}/messages", self.id)
+            for message in messages[start:start + 100]:
+                yield message
+
+
+class FakeGuild:
+    def __init__(self, api, ticket_categories):
+        self.api = api
+        self.id = next_snowflake()
+        self.unavailable = False
+        self.channels = {}
+        self.members = {}
+        self.roles = {}
+        self.categories = []
+        self.default_role = FakeRole(self.id, "@everyone")
+        self.me = FakeMember(self, next_snowflake(),
+                             "TayTickets", administrator=True, bot=True)
+        for category_data in ticket_categories.values():
+            category_id = int(category_data["category_id"])
+            if not discord.utils.get(self.categories, id=category_id):
+                self.categories.append(FakeCategory(
+                    category_id, category_data["display_name"]))
+            role_id = int(category_data["support_role_id"])
+            self.roles.setdefault(role_id, FakeRole(role_id, "Soporte"))
+
+    @property
+    def text_channels(self):
+        return list(self.channels.values())
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def get_role(self, role_id):
+        return self.roles.get(role_id)
+
+    def get_member(self, member_id):
+        return self.members.get(member_id)
+
+    async def fetch_member(self, member_id):
+        await self.api.request("GET /guilds/{guild_id}/members/{user_id}", self.id)
+        member = self.members.get(member_id)
+        if member is None:
+            raise discord.NotFound(FakeHTTPResponse(404), "Unknown Member")
+        return member
+
+    def add_member(self, name, administrator=False, roles=()):
+        member = FakeMember(self, next_snowflake(), name,
+                            administrator=administrator, roles=roles)
+        self.members[member.id] = member
+        for role in roles:
+            role.members.append(member)
+        return member
+
+    async def create_text_channel(self, name, overwrites=None, category=None):
+        await self.api.request("POST /guilds/{guild_id}/channels", self.id)
+        channel = FakeTextChannel(self.api, self, name, category, overwrites)
+        self.channels[channel.id] = channel
+        return channel
+
+
+class FakeHTTPResponse:
+    def __init__(self, status):
+        self.status = status
+        self.reason = "Fake"
+
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def _callback(self):
+        if self._done:
+            raise discord.InteractionResponded(self.interaction)
+        self._done = True
+        await self.interaction.api.request("POST /interactions/{interaction_id}/{interaction_token}/callback")
+
+    async def send_message(self, content=None, embed=None, embeds=None, view=None, ephemeral=False):
+        await self._callback()
+
+    async def edit_message(self, **fields):
+        await self._callback()
+        if self.interaction.message is not None:
+            self.interaction.message.view = fields.get(
+                "view", self.interaction.message.view)
+
+    async def send_modal(self, modal):
+        await self._callback()
+        self.interaction.modal = modal
+
+    async def defer(self, ephemeral=False, thinking=False):
+        await self._callback()
+
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, content=None, embed=None, embeds=None, view=None, ephemeral=False):
+        await self.interaction.api.request("POST /webhooks/{application_id}/{interaction_token}", self.interaction.id)
+
+
+class FakeInteraction:
+    def __init__(self, api, user, guild, channel=None, message=None):
+        self.api = api
+        self.id = next_snowflake()
+        self.user = user
+        self.guild = guild
+        self.guild_id = guild.id
+        self.channel = channel
+        self.channel_id = channel.id if channel else None
+        self.message = message
+        self.modal = None
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+
+class FakeBot:
+    def __init__(self, api, guilds, lang):
+        self.api = api
+        self.guilds = list(guilds)
+        self.lang = lang
+        self.intents = discord.Intents.all()
+        self.user = self.guilds[0].me
+        self.persistent_views = []
+        self.cached_messages = []
+        self.users = []
+        self.dispatched = collections.Counter()
+        self.listeners = collections.defaultdict(list)
+
+    def get_channel(self, channel_id):
+        for guild in self.guilds:
+            if channel_id in guild.channels:
+                return guild.channels[channel_id]
+        return None
+
+    def get_guild(self, guild_id):
+        return next((guild for guild in self.guilds if guild.id == guild_id), None)
+
+    def get_cog(self, name):
+        return None
+
+    def add_listener(self, func, name):
+        self.listeners[name].append(func)
+
+    def dispatch(self, event, *args):
+        self.dispatched[event] += 1
+        for listener in self.listeners[f"on_{event}"]:
+            asyncio.create_task(listener(*args))
+
+    async def wait_until_ready(self):
+        return None
@@ -1,8 +1,14 @@
+import asyncio
 import os
-import json
+import time
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
+from utils.guild_config import GuildConfigs
+from utils.members import MemberCache
+from utils.metrics import instrument_http, monitor_loop_lag, serve_metrics
+from utils.settings import Settings
+from utils.storage import PartitionedTicketStore, TicketStore
 
 load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
@@ -12,24 +18,87 @@ if not TOKEN:
         "El token de Discord no está configurado correctamente en el archivo .env")
 
 
-def load_json(file, default_data=None):
-    try:
-        with open(file, encoding="utf-8") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return default_data or {}
+settings = Settings()
+# Solo lo que se usa al arrancar; el resto se lee de settings.config y se recarga en caliente.
+config = settings.config
+LOW_MEMORY_MODE = config.get("low_memory_mode", False)
+SHARD_COUNT = config.get("shard_count")
+SHARD_IDS = config.get("shard_ids")
+
+
+def build_gateway_options():
+    if not LOW_MEMORY_MODE:
+        return {"intents": discord.Intents.all()}
+    # Solo lo que usan los tickets: canales y roles del servidor, y mensajes para comandos e inactividad.
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.guild_messages = True
+    intents.message_content = True
+    return {
+        "intents": intents,
+        "chunk_guilds_at_startup": False,
+        "member_cache_flags": discord.MemberCacheFlags.none(),
+        "max_messages": None,
+    }
+
+
+def build_shard_options():
+    # Sin shard_count, discord.py pide a Discord el número recomendado y este proceso los atiende todos.
+    if not SHARD_COUNT:
+        return {}
+    return {"shard_count": SHARD_COUNT, "shard_ids": SHARD_IDS}
+
+
+def build_ticket_store():
+    database_file = config.get("database_file", "tickets.db")
+    debounce = config.get("persist_debounce_ms", 50) / 1000
+    if SHARD_COUNT:
+        return PartitionedTicketStore(database_file, SHARD_COUNT, SHARD_IDS, debounce=debounce)
+    return TicketStore(database_file, debounce=debounce)
+
+
+def get_prefix(bot, message):
+    if message.guild is not None:
+        return bot.guild_configs.get(message.guild.id).get("bot_prefix", "!")
+    return settings.config.get("bot_prefix", "!")
+
+
+def apply_settings(settings):
+    bot.lang = settings.lang
+    bot.guild_configs.set_defaults(settings.config)
+
+
+async def watch_config():
+    while True:
+        await asyncio.sleep(settings.poll_interval)
+        settings.reload_if_changed()
+        bot.guild_configs.reload_changed()
+
 
+class TicketBot(commands.AutoShardedBot):
+    async def setup_hook(self):
+        # setup_hook se ejecuta una sola vez, antes de conectar; on_ready se repite en cada reconexión.
+        instrument_http(self.http)
+        self.loop_lag_task = asyncio.create_task(monitor_loop_lag())
+        self.config_task = asyncio.create_task(watch_config())
+        if config.get("metrics_port"):
+            self.metrics_server = await serve_metrics(config.get("metrics_host", "127.0.0.1"), config["metrics_port"])
+            print(f"📈 Métricas disponibles en http://{config.get('metrics_host', '127.0.0.1')}:{config['metrics_port']}/metrics")
+        await load_extensions()
+        print(f"🧩 Extensiones cargadas en {time.perf_counter() - self.launch_time:.2f}s")
 
-config = load_json('config.json', {})
-COMMAND_PREFIX = config.get("bot_prefix")
-LANGUAGE = config.get("language", "ES_es")
-TICKET_CATEGORIES = config.get("ticket_categories", {})
 
-bot = commands.Bot(command_prefix=COMMAND_PREFIX,
-                   intents=discord.Intents.all())
+bot = TicketBot(command_prefix=get_prefix, **build_gateway_options(), **build_shard_options())
+bot.launch_time = time.perf_counter()
 
-lang_file = f'lang/{LANGUAGE}.json'
-bot.lang = load_json(lang_file, load_json('lang/ES_es.json'))
+bot.settings = settings
+bot.lang = settings.lang
+bot.ticket_store = build_ticket_store()
+bot.guild_configs = GuildConfigs(
+    config, directory=config.get("guild_config_dir", "guilds"),
+    idle_seconds=config.get("guild_idle_minutes", 30) * 60)
+bot.member_cache = MemberCache(config.get("member_cache_size", 1000))
+settings.listeners.append(apply_settings)
 
 
 def print_bot_banner():
@@ -50,7 +119,7 @@ async def load_extensions():
             extension = f'cogs.{filename[:-3]}'
             try:
                 await bot.load_extension(extension)
-            except ImportError as e:
+            except commands.ExtensionError as e:
                 handle_extension_error(extension, e)
 
 
@@ -59,7 +128,7 @@ def handle_extension_error(extension, error):
         commands.ExtensionNotFound: f"La extensión '{extension}' no se encontró.",
         commands.ExtensionAlreadyLoaded: f"La extensión '{extension}' ya está cargada.",
         commands.NoEntryPointError: f"La extensión '{extension}' no tiene un punto de entrada 'setup'.",
-        commands.ExtensionFailed: f"La extensión '{extension}' falló al cargar. {error.original}",
+        commands.ExtensionFailed: f"La extensión '{extension}' falló al cargar. {getattr(error, 'original', error)}",
     }
     print(error_messages.get(type(error),
           f"Error al cargar la extensión '{extension}': {error}"))
@@ -68,7 +137,6 @@ def handle_extension_error(extension, error):
 @bot.event
 async def on_ready():
     print_bot_banner()
-    print(f"🤖 Bot conectado como {bot.user}")
-    await load_extensions()
+    print(f"🤖 Bot conectado como {bot.user} ({len(bot.guilds)} servidores, shards {sorted(bot.shards)})")
 
 bot.run(TOKEN)
@@ -0,0 +1,147 @@
+import os
+import re
+import time
+from datetime import datetime
+import discord
+from discord.ext import commands
+from utils.metrics import Histogram
+from utils.storage import DURATION_BUCKETS
+
+PERIOD_UNITS = {"h": 3600, "d": 86400, "w": 604800}
+PERIOD_PATTERN = re.compile(r"(\d+)([hdw])")
+MAX_ATTACHMENT_BYTES = 8 * 1024 * 1024
+
+
+def parse_period(period):
+    if period == "all":
+        return 0
+    match = PERIOD_PATTERN.fullmatch(period)
+    if not match:
+        return None
+    return int(match.group(1)) * PERIOD_UNITS[match.group(2)]
+
+
+def format_duration(seconds):
+    if seconds == float("inf"):
+        return f">{format_duration(DURATION_BUCKETS[-1])}"
+    minutes = int(seconds // 60)
+    if minutes < 60:
+        return f"{minutes}m"
+    hours, minutes = divmod(minutes, 60)
+    if hours < 24:
+        return f"{hours}h {minutes:02d}m"
+    days, hours = divmod(hours, 24)
+    return f"{days}d {hours}h"
+
+
+class TicketAnalytics(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    def format_durations(self, report, metric, total, count):
+        if not count:
+            return "-"
+        histogram = Histogram(DURATION_BUCKETS)
+        for row in report["buckets"]:
+            if row["metric"] == metric:
+                histogram.counts[row["bucket"]] += row["count"]
+                histogram.count += row["count"]
+        return self.bot.lang["ticket_stats_durations"].format(
+            avg=format_duration(total / count),
+            p50=format_duration(histogram.quantile(0.50)),
+            p90=format_duration(histogram.quantile(0.90)),
+            p99=format_duration(histogram.quantile(0.99)),
+            count=count)
+
+    async def parse_scope(self, ctx, category, period):
+        # "!ticket_stats 24h" también es válido: si el único argumento es un periodo, no es una categoría.
+        if category is not None and period is None and parse_period(category) is not None:
+            category, period = None, category
+        seconds = parse_period(period or "7d")
+        if seconds is None:
+            await ctx.send(self.bot.lang["ticket_stats_invalid_period"])
+            return None
+        ticket_categories = self.bot.guild_configs.get(
+            ctx.guild.id).ticket_categories
+        if category is not None and category not in ticket_categories:
+            await ctx.send(self.bot.lang["category_not_found_error"])
+            return None
+        return category, period or "7d", seconds
+
+    @commands.command(name="ticket_stats")
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def ticket_stats(self, ctx, category: str = None, period: str = None):
+        scope = await self.parse_scope(ctx, category, period)
+        if scope is None:
+            return
+        category, period, seconds = scope
+        lang = self.bot.lang
+        ticket_categories = self.bot.guild_configs.get(
+            ctx.guild.id).ticket_categories
+
+        start = time.perf_counter()
+        since_hour = int((time.time() - seconds) // 3600) if seconds else 0
+        report = await self.bot.ticket_store.for_guild(ctx.guild.id).rollup_report(
+            ctx.guild.id, category, since_hour)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        def display_name(key):
+            return ticket_categories.get(key, {}).get("display_name", key)
+
+        totals = report["totals"]
+        embed = discord.Embed(title=lang["ticket_stats_title"].format(
+            scope=display_name(category) if category else lang["ticket_stats_all_categories"],
+            period=period), color=discord.Color.blue())
+        embed.add_field(name=lang["ticket_stats_counts_title"],
+                        value=lang["ticket_stats_counts"].format(**totals), inline=False)
+        embed.add_field(name=lang["ticket_stats_claim_title"],
+                        value=self.format_durations(report, "claim_wait", totals["claim_wait_sum"],
+                                                    totals["claim_wait_count"]), inline=False)
+        embed.add_field(name=lang["ticket_stats_resolution_title"],
+                        value=self.format_durations(report, "resolution", totals["resolution_sum"],
+                                                    totals["resolution_count"]), inline=False)
+        if not category:
+            lines = [lang["ticket_stats_category_line"].format(
+                category=display_name(row["category"]), opened=row["opened"], closed=row["closed"])
+                     for row in report["categories"][:10]]
+            embed.add_field(name=lang["ticket_stats_categories_title"],
+                            value="\n".join(lines) or "-", inline=False)
+        lines = [lang["ticket_stats_staff_line"].format(
+            staff_id=row["staff_id"], claimed=row["claimed"], closed=row["closed"],
+            avg_wait=format_duration(row["claim_wait_sum"] / row["claim_wait_count"]) if row["claim_wait_count"] else "-")
+            for row in report["staff"]]
+        embed.add_field(name=lang["ticket_stats_staff_title"],
+                        value="\n".join(lines) or "-", inline=False)
+        peak = max(report["hours"], key=lambda row: row["opened"], default=None)
+        embed.add_field(name=lang["ticket_stats_peak_title"],
+                        value=lang["ticket_stats_peak"].format(hour=peak["hour_of_day"], opened=peak["opened"])
+                        if peak and peak["opened"] else "-", inline=False)
+        embed.set_footer(text=lang["ticket_stats_footer"].format(ms=elapsed_ms))
+        await ctx.send(embed=embed)
+
+    @commands.command(name="ticket_export")
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def ticket_export(self, ctx, period: str = "all"):
+        seconds = parse_period(period)
+        if seconds is None:
+            await ctx.send(self.bot.lang["ticket_stats_invalid_period"])
+            return
+        directory = self.bot.settings.config.get("exports_dir", "exports")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(
+            directory, f"tickets-{ctx.guild.id}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.csv")
+        since = time.time() - seconds if seconds else 0
+        rows = await self.bot.ticket_store.for_guild(ctx.guild.id).export_events(ctx.guild.id, since, path)
+        if os.path.getsize(path) > MAX_ATTACHMENT_BYTES:
+            await ctx.send(self.bot.lang["ticket_export_too_large"].format(rows=rows, path=path))
+            return
+        await ctx.send(self.bot.lang["ticket_export_done"].format(rows=rows), file=discord.File(path))
+        os.remove(path)
+
+
+async def setup(bot):
+    print("🔁 Cargando las estadísticas de tickets...")
+    await bot.add_cog(TicketAnalytics(bot))
+    print("✅ Estadísticas de tickets cargadas correctamente.")
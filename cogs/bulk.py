@@ -0,0 +1,245 @@
+import asyncio
+import time
+from typing import Union
+import discord
+from discord.ext import commands
+from cogs.analytics import parse_period
+from utils.bulk import BulkExecutor, BulkJob
+
+
+class TicketFilters(commands.FlagConverter):
+    category: str = None
+    older: str = None
+    inactive: str = None
+    claimed_by: discord.Member = None
+    all_tickets: bool = commands.flag(name="all", default=False)
+
+
+class TicketBulkOperations(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.jobs = {}
+        self.tasks = {}
+        self.resume_task = None
+
+    async def cog_load(self):
+        self.resume_task = asyncio.create_task(self.resume_jobs())
+
+    async def cog_unload(self):
+        # El cursor ya está guardado: los trabajos cancelados aquí se reanudan en el próximo arranque.
+        if self.resume_task:
+            self.resume_task.cancel()
+        for task in self.tasks.values():
+            task.cancel()
+
+    def last_activity(self, channel):
+        inactivity = self.bot.get_cog("InactivityScheduler")
+        if inactivity is not None and channel.id in inactivity.last_activity:
+            return inactivity.last_activity[channel.id]
+        if channel.last_message_id:
+            return discord.utils.snowflake_time(channel.last_message_id).timestamp()
+        return channel.created_at.timestamp()
+
+    async def matching_tickets(self, ctx, filters):
+        if not (filters.category or filters.older or filters.inactive or filters.claimed_by or filters.all_tickets):
+            await ctx.send(self.bot.lang["bulk_no_filter"])
+            return None
+        older = parse_period(filters.older) if filters.older else None
+        inactive = parse_period(filters.inactive) if filters.inactive else None
+        if (filters.older and older is None) or (filters.inactive and inactive is None):
+            await ctx.send(self.bot.lang["ticket_stats_invalid_period"])
+            return None
+        if filters.category and filters.category not in self.bot.guild_configs.get(ctx.guild.id).ticket_categories:
+            await ctx.send(self.bot.lang["category_not_found_error"])
+            return None
+
+        ticket_store = self.bot.ticket_store.for_guild(ctx.guild.id)
+        if filters.category:
+            tickets = ticket_store.list_by_category(ctx.guild.id, filters.category)
+        elif filters.claimed_by:
+            tickets = ticket_store.list_claimed_by(ctx.guild.id, filters.claimed_by.id)
+        else:
+            tickets = ticket_store.list_open_in_guild(ctx.guild.id)
+
+        now = time.time()
+        channel_ids = []
+        for ticket in tickets:
+            channel = ctx.guild.get_channel(ticket.channel_id)
+            if channel is None:
+                continue
+            if filters.claimed_by and ticket.claimed_by != filters.claimed_by.id:
+                continue
+            if older is not None and now - channel.created_at.timestamp() < older:
+                continue
+            if inactive is not None and now - self.last_activity(channel) < inactive:
+                continue
+            channel_ids.append(channel.id)
+        return sorted(channel_ids)
+
+    def progress_text(self, job):
+        key = {"running": "bulk_progress", "finished": "bulk_finished",
+               "cancelled": "bulk_cancelled"}[job.status]
+        return self.bot.lang[key].format(
+            job_id=job.job_id, action=self.bot.lang["bulk_actions"][job.action], processed=job.processed,
+            total=job.total, done=job.done, skipped=job.skipped, failed=job.failed)
+
+    async def report_progress(self, job):
+        self.bot.ticket_store.for_guild(job.guild_id).update_bulk_job(
+            job.job_id, **job.progress())
+        channel = self.bot.get_channel(job.progress_channel_id)
+        if channel is None:
+            return
+        try:
+            # Un solo mensaje editado, como mucho cada bulk_progress_seconds.
+            await channel.get_partial_message(job.progress_message_id).edit(content=self.progress_text(job))
+        except discord.HTTPException:
+            pass
+
+    async def build_operation(self, guild, job):
+        ticket_system = self.bot.ticket_system
+        ticket_store = self.bot.ticket_store.for_guild(guild.id)
+        user = await self.bot.member_cache.get(guild, job.created_by) or guild.me
+        target = None
+        if job.action == "add":
+            target = guild.get_role(job.target_id) or await self.bot.member_cache.get(guild, job.target_id)
+        elif job.action == "reassign":
+            target = await self.bot.member_cache.get(guild, job.target_id)
+
+        async def operation(channel_id):
+            # Cada paso comprueba el estado actual: al reanudar, lo ya hecho se omite.
+            channel = guild.get_channel(channel_id)
+            ticket = ticket_store.get(channel_id)
+            if channel is None or ticket is None or channel_id in ticket_system.closing:
+                return False
+            if job.action == "close":
+                if not await ticket_system.close_ticket(channel, user, delay=0):
+                    raise RuntimeError("no se pudo archivar la transcripción")
+            elif job.action == "archive":
+                await ticket_system.transcripts.archive(channel, channel_id)
+            elif job.action == "release":
+                if ticket.claimed_by is None:
+                    return False
+                await ticket_system.release_ticket(channel, user)
+            elif job.action == "reassign":
+                if ticket.claimed_by == target.id:
+                    return False
+                await ticket_system.claim_ticket(channel, target)
+            elif job.action == "add":
+                if channel.overwrites_for(target).read_messages:
+                    return False
+                await ticket_system.add_to_ticket(channel, target, user)
+            return True
+
+        return operation if target is not None or job.action not in ("add", "reassign") else None
+
+    async def run_job(self, guild, job):
+        config = self.bot.settings.config
+        executor = BulkExecutor(max_concurrent=config.get("bulk_concurrency", 4),
+                                progress_interval=config.get("bulk_progress_seconds", 2.0))
+        try:
+            operation = await self.build_operation(guild, job)
+            if operation is None:
+                # El miembro o rol de destino ya no existe.
+                job.cancelled = True
+            await executor.run(job, operation, self.report_progress)
+        finally:
+            self.jobs.pop(job.job_id, None)
+            self.tasks.pop(job.job_id, None)
+
+    def launch(self, guild, job):
+        self.jobs[job.job_id] = job
+        self.tasks[job.job_id] = asyncio.create_task(self.run_job(guild, job))
+
+    async def resume_jobs(self):
+        await self.bot.wait_until_ready()
+        for row in await self.bot.ticket_store.list_bulk_jobs("running"):
+            guild = self.bot.get_guild(row["guild_id"])
+            if guild is None or guild.unavailable or row["job_id"] in self.jobs:
+                continue
+            job = BulkJob(**row)
+            print(f"🔁 Reanudando la operación masiva #{job.job_id} ({job.cursor}/{job.total})")
+            self.launch(guild, job)
+
+    async def start_job(self, ctx, action, filters, target=None):
+        if any(job.guild_id == ctx.guild.id for job in self.jobs.values()):
+            await ctx.send(self.bot.lang["bulk_job_running"])
+            return
+        channel_ids = await self.matching_tickets(ctx, filters)
+        if channel_ids is None:
+            return
+        if not channel_ids:
+            await ctx.send(self.bot.lang["bulk_no_tickets"])
+            return
+        job = BulkJob(ctx.guild.id, action, channel_ids, target_id=target.id if target else None,
+                      created_by=ctx.author.id, progress_channel_id=ctx.channel.id)
+        ticket_store = self.bot.ticket_store.for_guild(ctx.guild.id)
+        job.job_id = await ticket_store.create_bulk_job(vars(job))
+        message = await ctx.send(self.progress_text(job))
+        job.progress_message_id = message.id
+        ticket_store.update_bulk_job(job.job_id, progress_message_id=message.id)
+        self.launch(ctx.guild, job)
+
+    @commands.group(name="ticket_bulk", invoke_without_command=True)
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def ticket_bulk(self, ctx):
+        await ctx.send(self.bot.lang["bulk_usage"])
+
+    @ticket_bulk.command(name="close")
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def bulk_close(self, ctx, *, filters: TicketFilters):
+        await self.start_job(ctx, "close", filters)
+
+    @ticket_bulk.command(name="archive")
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def bulk_archive(self, ctx, *, filters: TicketFilters):
+        await self.start_job(ctx, "archive", filters)
+
+    @ticket_bulk.command(name="release")
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def bulk_release(self, ctx, *, filters: TicketFilters):
+        await self.start_job(ctx, "release", filters)
+
+    @ticket_bulk.command(name="reassign")
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def bulk_reassign(self, ctx, member: discord.Member, *, filters: TicketFilters):
+        await self.start_job(ctx, "reassign", filters, member)
+
+    @ticket_bulk.command(name="add")
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def bulk_add(self, ctx, target: Union[discord.Member, discord.Role], *, filters: TicketFilters):
+        await self.start_job(ctx, "add", filters, target)
+
+    @ticket_bulk.command(name="status")
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def bulk_status(self, ctx):
+        lines = [self.progress_text(job) for job in self.jobs.values()
+                 if job.guild_id == ctx.guild.id]
+        embed = discord.Embed(title=self.bot.lang["bulk_jobs_title"],
+                              description="\n".join(lines) or self.bot.lang["bulk_jobs_empty"],
+                              color=discord.Color.blue())
+        await ctx.send(embed=embed)
+
+    @ticket_bulk.command(name="cancel")
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def bulk_cancel(self, ctx, job_id: int):
+        job = self.jobs.get(job_id)
+        if job is None or job.guild_id != ctx.guild.id:
+            await ctx.send(self.bot.lang["bulk_job_not_found"])
+            return
+        # Los tickets en curso terminan; no se empieza ninguno más.
+        job.cancelled = True
+        await ctx.send(self.bot.lang["bulk_cancelling"].format(job_id=job_id))
+
+
+async def setup(bot):
+    print("🔁 Cargando las operaciones masivas de tickets...")
+    await bot.add_cog(TicketBulkOperations(bot))
+    print("✅ Operaciones masivas de tickets cargadas correctamente.")
@@ -0,0 +1,232 @@
+import asyncio
+import heapq
+import time
+import discord
+from discord.ext import commands
+
+# Si el cierre automático falla (p. ej. al archivar la transcripción), se reintenta pasado este tiempo.
+AUTO_CLOSE_RETRY_SECONDS = 300
+# La última actividad se guarda como mucho una vez por minuto y canal; tras reiniciar, los plazos
+# pueden adelantarse ese minuto, nada más.
+ACTIVITY_SAVE_SECONDS = 60
+
+
+class InactivityScheduler(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        # Plazos por canal: cada servidor define los suyos en sus categorías.
+        self.rules = {}
+        self.last_activity = {}
+        self.reminded = set()
+        self.saved = {}
+        self.scheduled = {}
+        self.deadlines = []
+        self.wakeup = asyncio.Event()
+        self.task = None
+        self.closing = set()
+        # Servidores cuyas reglas hay que recalcular tras una recarga; None significa todos.
+        self.stale_guilds = set()
+        self.refresh_task = None
+        bot.settings.listeners.append(self.apply_settings)
+        bot.guild_configs.on_reload.append(self.reload_rules)
+
+    async def cog_load(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def cog_unload(self):
+        if self.task:
+            self.task.cancel()
+        if self.refresh_task:
+            self.refresh_task.cancel()
+        for task in self.closing:
+            task.cancel()
+
+    def next_deadline(self, channel_id):
+        reminder, auto_close = self.rules[channel_id]
+        last = self.last_activity[channel_id]
+        candidates = []
+        if reminder and channel_id not in self.reminded:
+            candidates.append(last + reminder)
+        if auto_close:
+            candidates.append(last + auto_close)
+        return min(candidates) if candidates else None
+
+    def track(self, channel, category, last_activity, reminded=False):
+        category_data = self.bot.guild_configs.get(
+            channel.guild.id).ticket_categories.get(category, {})
+        reminder = category_data.get("reminder_hours")
+        auto_close = category_data.get("auto_close_hours")
+        if not (reminder or auto_close):
+            return
+        self.rules[channel.id] = (reminder * 3600 if reminder else None,
+                                  auto_close * 3600 if auto_close else None)
+        self.last_activity[channel.id] = last_activity
+        if reminded:
+            self.reminded.add(channel.id)
+        self.schedule(channel.id)
+
+    def save(self, channel, force=False):
+        last_activity = self.last_activity.get(channel.id)
+        if last_activity is None:
+            return
+        if not force and last_activity - self.saved.get(channel.id, 0) < ACTIVITY_SAVE_SECONDS:
+            return
+        self.saved[channel.id] = last_activity
+        self.bot.ticket_store.for_guild(channel.guild.id).set_activity(
+            channel.id, last_activity, channel.id in self.reminded)
+
+    def schedule(self, channel_id, deadline=None):
+        if deadline is None:
+            deadline = self.next_deadline(channel_id)
+        if deadline is None:
+            return
+        self.scheduled[channel_id] = deadline
+        if not self.deadlines or deadline < self.deadlines[0][0]:
+            self.wakeup.set()
+        heapq.heappush(self.deadlines, (deadline, channel_id))
+
+    def untrack(self, channel_id):
+        # Las entradas del montículo que ya no coinciden con scheduled se descartan al salir.
+        self.rules.pop(channel_id, None)
+        self.last_activity.pop(channel_id, None)
+        self.reminded.discard(channel_id)
+        self.saved.pop(channel_id, None)
+        self.scheduled.pop(channel_id, None)
+
+    def apply_settings(self, settings):
+        self.reload_rules()
+
+    def reload_rules(self, guild_id=None):
+        # set_defaults avisa una vez por servidor: todas las recargas seguidas se atienden en una pasada.
+        if guild_id is None:
+            self.stale_guilds = None
+        elif self.stale_guilds is not None:
+            self.stale_guilds.add(guild_id)
+        if self.refresh_task is None or self.refresh_task.done():
+            self.refresh_task = asyncio.create_task(self.refresh_rules())
+
+    async def refresh_rules(self):
+        await self.bot.wait_until_ready()
+        guild_ids, self.stale_guilds = self.stale_guilds, set()
+        await self.rebuild(guild_ids)
+
+    async def rebuild(self, guild_ids=None):
+        # El último mensaje del canal puede ser del bot (el recordatorio, por ejemplo): vale lo guardado.
+        activity = await self.bot.ticket_store.list_activity()
+        for ticket in self.bot.ticket_store.list_open():
+            if guild_ids is not None and ticket.guild_id not in guild_ids:
+                continue
+            channel = self.bot.get_channel(ticket.channel_id)
+            if channel is None:
+                continue
+            if ticket.channel_id in self.last_activity:
+                # Ya seguido: se conservan su actividad y su aviso, solo cambian los plazos.
+                last_activity = self.last_activity[ticket.channel_id]
+                reminded = ticket.channel_id in self.reminded
+                saved = self.saved.get(ticket.channel_id)
+                self.untrack(ticket.channel_id)
+                self.track(channel, ticket.category, last_activity, reminded)
+                if saved is not None and ticket.channel_id in self.rules:
+                    self.saved[ticket.channel_id] = saved
+                continue
+            if ticket.channel_id in activity:
+                last_activity, reminded = activity[ticket.channel_id]
+                self.saved[ticket.channel_id] = last_activity
+                self.track(channel, ticket.category, last_activity, reminded)
+                continue
+            if channel.last_message_id:
+                last_activity = discord.utils.snowflake_time(
+                    channel.last_message_id).timestamp()
+            else:
+                last_activity = channel.created_at.timestamp()
+            self.track(channel, ticket.category, last_activity)
+
+    async def run(self):
+        await self.bot.wait_until_ready()
+        await self.rebuild()
+        while True:
+            timeout = self.deadlines[0][0] - time.time() if self.deadlines else None
+            if timeout is None or timeout > 0:
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            deadline, channel_id = heapq.heappop(self.deadlines)
+            if self.scheduled.get(channel_id) != deadline:
+                continue
+            del self.scheduled[channel_id]
+            try:
+                await self.expire(channel_id)
+            except discord.HTTPException as e:
+                print(f"⚠️ Error al procesar la inactividad del canal {channel_id}: {e}")
+                if channel_id in self.rules:
+                    self.schedule(channel_id)
+
+    async def expire(self, channel_id):
+        # on_message solo actualiza la marca de tiempo; aquí recalculamos el plazo real.
+        reminder, auto_close = self.rules[channel_id]
+        idle = time.time() - self.last_activity[channel_id]
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            self.untrack(channel_id)
+            return
+
+        if auto_close and idle >= auto_close:
+            embed = discord.Embed(title=self.bot.lang["ticket_auto_closed_title"],
+                                  description=self.bot.lang["ticket_auto_closed"].format(
+                                      seconds=self.bot.ticket_system.close_delay_for(channel.guild.id)),
+                                  color=discord.Color.red()
+                                  )
+            await channel.send(embed=embed)
+            # El cierre espera close_delay_seconds: no bloquea el resto de plazos.
+            task = asyncio.create_task(self.auto_close(channel))
+            self.closing.add(task)
+            task.add_done_callback(self.closing.discard)
+            return
+
+        if reminder and idle >= reminder and channel_id not in self.reminded:
+            self.reminded.add(channel_id)
+            self.save(channel, force=True)
+            ticket = self.bot.ticket_store.for_guild(channel.guild.id).get(channel_id)
+            mention = f"<@{ticket.opened_by}>" if ticket and ticket.opened_by else ""
+            await channel.send(self.bot.lang["ticket_inactive_reminder"].format(user_mention=mention))
+        self.schedule(channel_id)
+
+    async def auto_close(self, channel):
+        try:
+            closed = await self.bot.ticket_system.close_ticket(channel, self.bot.user)
+        except discord.HTTPException as e:
+            print(f"⚠️ Error al cerrar por inactividad el canal {channel.id}: {e}")
+            closed = False
+        if not closed and channel.id in self.rules:
+            self.schedule(channel.id, time.time() + AUTO_CLOSE_RETRY_SECONDS)
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if message.author.bot or message.channel.id not in self.last_activity:
+            return
+        self.last_activity[message.channel.id] = time.time()
+        if message.channel.id in self.reminded:
+            # Tras un recordatorio el siguiente aviso puede quedar antes que el plazo ya programado.
+            self.reminded.discard(message.channel.id)
+            self.save(message.channel, force=True)
+            self.schedule(message.channel.id)
+        else:
+            self.save(message.channel)
+
+    @commands.Cog.listener()
+    async def on_ticket_opened(self, channel, category):
+        self.track(channel, category, time.time())
+        self.save(channel, force=True)
+
+    @commands.Cog.listener()
+    async def on_ticket_closed(self, channel_id):
+        self.untrack(channel_id)
+
+
+async def setup(bot):
+    print("🔁 Cargando el cierre automático de tickets...")
+    await bot.add_cog(InactivityScheduler(bot))
+    print("✅ Cierre automático de tickets cargado correctamente.")
@@ -1,117 +1,182 @@
-import json
+import asyncio
+import os
+from collections import Counter
 from datetime import datetime
 import discord
 from discord.ext import commands
+from utils.log_queue import LogQueue
+from utils.metrics import metrics
 
-
-def load_json(file, default_data=None):
-    try:
-        with open(file, encoding="utf-8") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return default_data if default_data is not None else {}
-
-
-def save_json(file, data):
-    try:
-        with open(file, 'w', encoding="utf-8") as f:
-            json.dump(data, f, indent=4)
-    except (FileNotFoundError, OSError, json.JSONDecodeError) as e:
-        print(f"⚠️ Error al guardar {file}: {e}")
+LOG_STATS = ("queued", "sent", "messages", "dropped",
+             "spilled", "replayed", "pending")
 
 
 class TicketLogs(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.config = load_json('config.json', {})
-        self.log_channel_id = int(self.config.get("log_channel_id", 0))
-        self.tickets = load_json('tickets.json', {})
-
-    def get_log_channel(self):
-        return self.bot.get_channel(self.log_channel_id)
-
+        self.ticket_store = bot.ticket_store
+        self.spill_file = bot.settings.config.get(
+            "log_spill_file", "logs_spill.jsonl")
+        # Una cola por servidor, creada con el primer log y cerrada cuando el servidor queda inactivo
+        # o cambia la configuración de sus logs; la siguiente se crea ya con los valores nuevos.
+        self.log_queues = {}
+        self.queue_settings = {}
+        self.retiring = set()
+        self.retired = Counter()
+        bot.guild_configs.on_evict.append(self.forget)
+        bot.guild_configs.on_reload.append(self.reload)
+        metrics.add_collector(self.collect_metrics)
+
+    async def collect_metrics(self):
+        return [("ticket_log_events", (("state", state),), value)
+                for state, value in self.stats().items()]
+
+    def get_log_channel(self, guild_id):
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            return None
+        return guild.get_channel(self.bot.guild_configs.get(guild_id).log_channel_id)
+
+    def log_settings(self, guild_config):
+        # El canal de logs se busca en cada envío: cambiarlo no obliga a recrear la cola.
+        config = self.bot.settings.config
+        return {"webhook_url": guild_config.get("log_webhook_url"),
+                "batch_size": config.get("log_batch_size", 10),
+                "flush_interval": config.get("log_flush_seconds", 2.0)}
+
+    def queue_for(self, guild_id):
+        log_queue = self.log_queues.get(guild_id)
+        if log_queue is None:
+            settings = self.queue_settings[guild_id] = self.log_settings(
+                self.bot.guild_configs.get(guild_id))
+            root, ext = os.path.splitext(self.spill_file)
+            log_queue = self.log_queues[guild_id] = LogQueue(
+                self.bot, lambda: self.get_log_channel(guild_id),
+                spill_file=f"{root}.{guild_id}{ext}", **settings)
+        return log_queue
+
+    def reload(self, guild_id):
+        # Editar una traducción o cualquier otra clave no debe cerrar la cola de todos los servidores.
+        guild_config = self.bot.guild_configs.partitions.get(guild_id)
+        if guild_config is not None and self.queue_settings.get(guild_id) != self.log_settings(guild_config):
+            self.forget(guild_id)
+
+    def forget(self, guild_id):
+        self.queue_settings.pop(guild_id, None)
+        log_queue = self.log_queues.pop(guild_id, None)
+        if log_queue is not None:
+            task = asyncio.create_task(self.retire(log_queue))
+            self.retiring.add(task)
+            task.add_done_callback(self.retiring.discard)
+
+    async def retire(self, log_queue):
+        await log_queue.close()
+        stats = log_queue.stats()
+        stats.pop("pending")
+        self.retired.update(stats)
+
+    def stats(self):
+        totals = Counter(dict.fromkeys(LOG_STATS, 0))
+        totals.update(self.retired)
+        for log_queue in self.log_queues.values():
+            totals.update(log_queue.stats())
+        return dict(totals)
+
+    @metrics.timed("ticket_log")
     async def log_ticket_creation(self, user: discord.Member, category: str, channel: discord.TextChannel):
-        log_channel = self.get_log_channel()
-        if log_channel:
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')
-            self.tickets[channel.id] = {
-                "opened_by": user.id,
-                "category": category,
-                "opened_at": timestamp
-            }
-            save_json('tickets.json', self.tickets)
-
-            embed = discord.Embed(title="📌 Ticket Creado",
+        ticket = self.ticket_store.for_guild(channel.guild.id).get(channel.id)
+        if ticket:
+            lang = self.bot.lang["logs"]
+            timestamp = ticket.opened_at
+            embed = discord.Embed(title=lang["created_title"],
                                   color=discord.Color.green())
-            embed.add_field(name="Usuario", value=user.mention, inline=True)
-            embed.add_field(name="Categoría", value=category, inline=True)
-            embed.add_field(name="Canal", value=channel.mention, inline=False)
-            embed.add_field(name="Fecha de Apertura",
+            embed.add_field(name=lang["user"], value=user.mention, inline=True)
+            embed.add_field(name=lang["category"], value=category, inline=True)
+            embed.add_field(name=lang["channel"], value=channel.mention, inline=False)
+            embed.add_field(name=lang["opened_at"],
                             value=timestamp, inline=False)
-            embed.set_footer(text=f"Ticket ID: {channel.id}")
-            await log_channel.send(embed=embed)
+            embed.set_footer(text=lang["footer"].format(ticket_id=channel.id))
+            self.queue_for(channel.guild.id).put(embed)
 
+    @metrics.timed("ticket_log")
     async def log_ticket_closure(self, user: discord.Member, channel: discord.TextChannel):
-        log_channel = self.get_log_channel()
-        if log_channel and channel.id in self.tickets:
-            ticket_data = self.tickets[channel.id]
-            opened_by = self.bot.get_user(ticket_data["opened_by"])
-            category = ticket_data["category"]
-            opened_at = ticket_data["opened_at"]
+        ticket = self.ticket_store.for_guild(channel.guild.id).get(channel.id)
+        if ticket:
+            lang = self.bot.lang["logs"]
+            category = ticket.category
+            opened_at = ticket.opened_at
             closed_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')
 
-            embed = discord.Embed(title="🔒 Ticket Cerrado",
+            embed = discord.Embed(title=lang["closed_title"],
                                   color=discord.Color.red())
             embed.add_field(
-                name="Abierto por",
-                value=opened_by.mention if opened_by else "Desconocido",
+                name=lang["opened_by"],
+                value=f"<@{ticket.opened_by}>" if ticket.opened_by else lang["unknown_user"],
                 inline=True
             )
-            embed.add_field(name="Cerrado por",
+            embed.add_field(name=lang["closed_by"],
                             value=user.mention, inline=True)
-            embed.add_field(name="Categoría", value=category, inline=False)
-            embed.add_field(name="Fecha de Apertura",
+            embed.add_field(name=lang["category"], value=category, inline=False)
+            embed.add_field(name=lang["opened_at"],
                             value=opened_at, inline=False)
-            embed.add_field(name="Fecha de Cierre",
+            embed.add_field(name=lang["closed_at"],
                             value=closed_at, inline=False)
-            embed.set_footer(text=f"Ticket ID: {channel.id}")
-            await log_channel.send(embed=embed)
-
-            del self.tickets[channel.id]
-            save_json('tickets.json', self.tickets)
+            embed.set_footer(text=lang["footer"].format(ticket_id=channel.id))
+            self.queue_for(channel.guild.id).put(embed)
 
+    @metrics.timed("ticket_log")
     async def log_ticket_claim(self, user: discord.Member, channel: discord.TextChannel):
-        log_channel = self.get_log_channel()
-        if log_channel and channel.id in self.tickets:
+        if self.ticket_store.for_guild(channel.guild.id).get(channel.id):
+            lang = self.bot.lang["logs"]
             claimed_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')
 
-            embed = discord.Embed(title="👤 Ticket Reclamado",
+            embed = discord.Embed(title=lang["claimed_title"],
                                   color=discord.Color.yellow())
-            embed.add_field(name="Reclamado por",
+            embed.add_field(name=lang["claimed_by"],
                             value=user.mention, inline=True)
-            embed.add_field(name="Canal", value=channel.mention, inline=False)
-            embed.add_field(name="Fecha de Reclamo",
+            embed.add_field(name=lang["channel"], value=channel.mention, inline=False)
+            embed.add_field(name=lang["claimed_at"],
                             value=claimed_at, inline=False)
-            embed.set_footer(text=f"Ticket ID: {channel.id}")
-            await log_channel.send(embed=embed)
+            embed.set_footer(text=lang["footer"].format(ticket_id=channel.id))
+            self.queue_for(channel.guild.id).put(embed)
 
+    @metrics.timed("ticket_log")
     async def log_ticket_release(self, user: discord.Member, channel: discord.TextChannel):
-        log_channel = self.get_log_channel()
-        if log_channel and channel.id in self.tickets:
+        if self.ticket_store.for_guild(channel.guild.id).get(channel.id):
+            lang = self.bot.lang["logs"]
             released_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')
 
-            embed = discord.Embed(title="🔓 Ticket Liberado",
+            embed = discord.Embed(title=lang["released_title"],
                                   color=discord.Color.orange())
-            embed.add_field(name="Liberado por",
+            embed.add_field(name=lang["released_by"],
                             value=user.mention, inline=True)
-            embed.add_field(name="Canal", value=channel.mention, inline=False)
-            embed.add_field(name="Fecha de Liberación",
+            embed.add_field(name=lang["channel"], value=channel.mention, inline=False)
+            embed.add_field(name=lang["released_at"],
                             value=released_at, inline=False)
-            embed.set_footer(text=f"Ticket ID: {channel.id}")
-            await log_channel.send(embed=embed)
+            embed.set_footer(text=lang["footer"].format(ticket_id=channel.id))
+            self.queue_for(channel.guild.id).put(embed)
+
+    async def close(self):
+        log_queues = list(self.log_queues.values())
+        self.log_queues.clear()
+        self.queue_settings.clear()
+        for log_queue in log_queues:
+            await self.retire(log_queue)
+        # Las colas que ya se estaban cerrando terminan de enviar o guardar sus logs.
+        await asyncio.gather(*self.retiring, return_exceptions=True)
+
+    async def cog_unload(self):
+        await self.close()
+
+
+def get_ticket_logs(bot):
+    # tickets.py y esta extensión comparten la misma instancia, y con ella la misma cola.
+    if getattr(bot, "ticket_logs", None) is None:
+        bot.ticket_logs = TicketLogs(bot)
+    return bot.ticket_logs
 
 
 async def setup(bot):
     print("🔁 Cargando el sistema de logs...")
-    await bot.add_cog(TicketLogs(bot))
+    await bot.add_cog(get_ticket_logs(bot))
     print("✅ Sistema de logs cargado correctamente.")
@@ -1,25 +1,21 @@
 import asyncio
-import json
+import os
+import time
+try:
+    import resource
+except ImportError:
+    resource = None
+from datetime import datetime
 import discord
 from discord.ext import commands
 from discord.ui import Select, View, Button, Modal, TextInput
-from cogs.logs import TicketLogs
-
-
-def load_json(file, default_data=None):
-    try:
-        with open(file, encoding="utf-8") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return default_data if default_data is not None else {}
-
-
-def save_json(file, data):
-    try:
-        with open(file, 'w', encoding="utf-8") as f:
-            json.dump(data, f, indent=4)
-    except (FileNotFoundError, OSError, json.JSONDecodeError) as e:
-        print(f"⚠️ Error al guardar {file}: {e}")
+from cogs.analytics import MAX_ATTACHMENT_BYTES
+from cogs.logs import get_ticket_logs
+from utils.admission import AdmissionController
+from utils.assignment import AssignmentIndex
+from utils.metrics import metrics
+from utils.ticket_registry import Ticket
+from utils.transcripts import TranscriptArchiver
 
 
 class TicketDropdown(Select):
@@ -32,30 +28,51 @@ class TicketDropdown(Select):
         super().__init__(
             placeholder=self.bot.lang["category_selection_description"], options=options)
 
+    @metrics.timed("ticket_interaction")
     async def callback(self, interaction: discord.Interaction):
         category = self.values[0]
         guild = interaction.guild
+        admission = self.bot.ticket_system.admission
+
+        # Un doble clic no debe crear dos canales: solo una creación en curso por usuario.
+        if not admission.try_begin(guild.id, interaction.user.id):
+            await interaction.response.send_message(self.bot.lang["ticket_creation_in_progress"], ephemeral=True)
+            return
+        try:
+            # Respondemos ya para no superar el límite de 3 segundos de la interacción.
+            await interaction.response.defer(ephemeral=True, thinking=True)
+            await self.create_ticket(interaction, guild, category)
+        except discord.HTTPException as e:
+            # Tras defer() el usuario ve "pensando..." hasta que llegue una respuesta.
+            print(f"⚠️ Error al crear el ticket de {interaction.user} en {guild.id}: {e}")
+            try:
+                await self.send_error(interaction, "ticket_create_failed_error", discord.Color.red())
+            except discord.HTTPException:
+                pass
+        finally:
+            admission.end(guild.id, interaction.user.id)
+
+    async def send_error(self, interaction, description_key, color):
+        embed = discord.Embed(
+            title=self.bot.lang["ticket_error_title"],
+            description=self.bot.lang[description_key],
+            color=color
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+    async def create_ticket(self, interaction, guild, category):
         ticket_name = f"ticket-{interaction.user.name}".lower()
+        ticket_store = self.bot.ticket_store.for_guild(guild.id)
 
-        if ticket_name in self.bot.ticket_system.tickets:
-            embed = discord.Embed(
-                title=self.bot.lang["ticket_error_title"],
-                description=self.bot.lang["ticket_already_open_error"],
-                color=discord.Color.red()
-            )
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+        if ticket_store.get_open_by_opener(guild.id, interaction.user.id):
+            await self.send_error(interaction, "ticket_already_open_error", discord.Color.red())
             return
 
         category_data = self.ticket_categories[category]
         category_id = int(category_data["category_id"])
         category_obj = discord.utils.get(guild.categories, id=category_id)
         if not category_obj:
-            embed = discord.Embed(
-                title=self.bot.lang["ticket_error_title"],
-                description=self.bot.lang["category_not_found_error"],
-                color=discord.Color.orange()
-            )
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+            await self.send_error(interaction, "category_not_found_error", discord.Color.orange())
             return
 
         support_role_id = int(category_data["support_role_id"])
@@ -71,15 +88,34 @@ class TicketDropdown(Select):
             overwrites[support_role] = discord.PermissionOverwrite(
                 read_messages=True, send_messages=True)
 
-        ticket_channel = await guild.create_text_channel(ticket_name, overwrites=overwrites, category=category_obj)
-        self.bot.ticket_system.tickets[ticket_name] = {
-            "channel_id": ticket_channel.id, "claimed_by": None}
-        self.bot.ticket_system.save_tickets()
+        async def on_queued(position):
+            await interaction.followup.send(self.bot.lang["ticket_queued"].format(position=position), ephemeral=True)
+
+        admission = self.bot.ticket_system.admission
+        async with admission.slot(guild.id, category, on_queued):
+            max_open = category_data.get("max_open_tickets")
+            if max_open and (ticket_store.count_open_in_category(guild.id, category)
+                             + admission.creating(guild.id, category)) > max_open:
+                await self.send_error(interaction, "category_full_error", discord.Color.orange())
+                return
+
+            ticket_channel = await guild.create_text_channel(ticket_name, overwrites=overwrites, category=category_obj)
+            ticket_store.open_ticket(Ticket(
+                channel_id=ticket_channel.id,
+                guild_id=guild.id,
+                name=ticket_name,
+                opened_by=interaction.user.id,
+                category=category,
+                opened_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')
+            ))
+            ticket_store.record_event(
+                ticket_channel.id, "open", interaction.user.id)
         await self.bot.ticket_system.ticket_logs.log_ticket_creation(interaction.user, category, ticket_channel)
-        view = View()
-        view.add_item(CloseTicketButton(self.bot, ticket_channel))
-        view.add_item(ClaimTicketButton(self.bot, ticket_channel))
-        view.add_item(AddUserButton(self.bot, ticket_channel))
+        self.bot.dispatch("ticket_opened", ticket_channel, category)
+        assignee = None
+        if category_data.get("auto_assign"):
+            assignee = self.bot.ticket_system.auto_assign(ticket_channel, category, category_data)
+        view = TicketControlView(self.bot, claimed=assignee is not None)
 
         embed = discord.Embed(
             title=self.bot.lang["ticket_opened_title"],
@@ -88,6 +124,10 @@ class TicketDropdown(Select):
             color=discord.Color.green()
         )
         await ticket_channel.send(embed=embed, view=view)
+        # Los botones los atiende la vista persistente de setup(); la copia por mensaje solo ocuparía memoria.
+        view.stop()
+        if assignee is not None:
+            await self.bot.ticket_system.claim_ticket(ticket_channel, assignee)
 
         embed_response = discord.Embed(
             title=self.bot.lang["ticket_created_title"],
@@ -95,20 +135,27 @@ class TicketDropdown(Select):
                 category_display_name=category_data['display_name'], ticket_channel_mention=ticket_channel.mention),
             color=discord.Color.green()
         )
-        await interaction.response.send_message(embed=embed_response, ephemeral=True)
+        await interaction.followup.send(embed=embed_response, ephemeral=True)
 
 
 class TicketButton(Button):
-    def __init__(self, bot, ticket_categories):
+    def __init__(self, bot):
         super().__init__(
-            label=bot.lang["buttons"]["open_ticket"], style=discord.ButtonStyle.primary)
+            label=bot.lang["buttons"]["open_ticket"], style=discord.ButtonStyle.primary,
+            custom_id="tay_tickets:open")
         self.bot = bot
-        self.ticket_categories = ticket_categories
 
+    @metrics.timed("ticket_interaction")
     async def callback(self, interaction: discord.Interaction):
+        # El mismo botón persistente sirve a todos los servidores; las categorías son las del servidor.
+        ticket_categories = self.bot.guild_configs.get(
+            interaction.guild_id).ticket_categories
+        if not ticket_categories:
+            await interaction.response.send_message(self.bot.lang["category_not_found_error"], ephemeral=True)
+            return
         view = View()
         view.add_item(TicketDropdown(
-            self.bot, interaction, self.ticket_categories))
+            self.bot, interaction, ticket_categories))
         embed = discord.Embed(title=self.bot.lang["category_selection_title"],
                               description=self.bot.lang["category_selection_description"],
                               color=discord.Color.blue()
@@ -116,95 +163,114 @@ class TicketButton(Button):
         await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
 
 
+class TicketPanelView(View):
+    def __init__(self, bot):
+        super().__init__(timeout=None)
+        self.add_item(TicketButton(bot))
+
+
+class TicketControlView(View):
+    def __init__(self, bot, claimed=False):
+        super().__init__(timeout=None)
+        self.add_item(CloseTicketButton(bot))
+        self.add_item(ReleaseTicketButton(bot) if claimed else ClaimTicketButton(bot))
+        self.add_item(AddUserButton(bot))
+
+
+async def get_ticket_or_reply(bot, interaction):
+    ticket_data = bot.ticket_store.for_guild(interaction.guild_id).get(interaction.channel_id)
+    if ticket_data is None:
+        await interaction.response.send_message(bot.lang["ticket_not_found"], ephemeral=True)
+    return ticket_data
+
+
 class CloseTicketButton(Button):
-    def __init__(self, bot, ticket_channel):
+    def __init__(self, bot):
         super().__init__(
-            label=bot.lang["buttons"]["close_ticket"], style=discord.ButtonStyle.danger)
+            label=bot.lang["buttons"]["close_ticket"], style=discord.ButtonStyle.danger,
+            custom_id="tay_tickets:close")
         self.bot = bot
-        self.ticket_channel = ticket_channel
 
+    @metrics.timed("ticket_interaction")
     async def callback(self, interaction: discord.Interaction):
+        if await get_ticket_or_reply(self.bot, interaction) is None:
+            return
+        if interaction.channel_id in self.bot.ticket_system.closing:
+            await interaction.response.send_message(self.bot.lang["ticket_already_closing"], ephemeral=True)
+            return
+
+        ticket_channel = interaction.channel
         embed = discord.Embed(title=self.bot.lang["close_ticket"],
-                              description=self.bot.lang["close_ticket_description"],
+                              description=self.bot.lang["close_ticket_description"].format(
+                                  seconds=self.bot.ticket_system.close_delay_for(interaction.guild_id)),
                               color=discord.Color.red()
                               )
-        await self.ticket_channel.send(embed=embed)
-        ticket_name = self.ticket_channel.name
-        if ticket_name in self.bot.ticket_system.tickets:
-            del self.bot.ticket_system.tickets[ticket_name]
-            self.bot.ticket_system.save_tickets()
-        await self.bot.ticket_system.ticket_logs.log_ticket_closure(interaction.user, self.ticket_channel)
-        await asyncio.sleep(5)
-        await self.ticket_channel.delete()
+        await interaction.response.send_message(embed=embed)
+        await self.bot.ticket_system.close_ticket(ticket_channel, interaction.user)
+
+
+async def refresh_controls(bot, interaction, ticket_data):
+    # El botón visible puede no coincidir con el estado (reparto automático, operaciones masivas):
+    # se corrige sin cambiar nada y, si el ticket es de otro, se avisa.
+    view = TicketControlView(bot, claimed=ticket_data.claimed_by is not None)
+    await interaction.response.edit_message(view=view)
+    view.stop()
+    if ticket_data.claimed_by not in (None, interaction.user.id):
+        await interaction.followup.send(bot.lang["ticket_already_claimed"], ephemeral=True)
 
 
 class ClaimTicketButton(Button):
-    def __init__(self, bot, ticket_channel):
+    def __init__(self, bot):
         super().__init__(
-            label=bot.lang["buttons"]["claim_ticket"], style=discord.ButtonStyle.success)
+            label=bot.lang["buttons"]["claim_ticket"], style=discord.ButtonStyle.success,
+            custom_id="tay_tickets:claim")
         self.bot = bot
-        self.ticket_channel = ticket_channel
 
+    @metrics.timed("ticket_interaction")
     async def callback(self, interaction: discord.Interaction):
-        ticket_name = self.ticket_channel.name
-        ticket_data = self.bot.ticket_system.tickets.get(ticket_name)
-
+        ticket_data = await get_ticket_or_reply(self.bot, interaction)
         if ticket_data is None:
-            await interaction.response.send_message("No se encontró información del ticket.", ephemeral=True)
             return
 
-        if ticket_data["claimed_by"] is None:
-            ticket_data["claimed_by"] = interaction.user.id
-            self.bot.ticket_system.save_tickets()
-
-            self.label = self.bot.lang["buttons"]["release_ticket"]
-            self.style = discord.ButtonStyle.secondary
-
-            embed = discord.Embed(
-                title=self.bot.lang["ticket_claimed_title"],
-                description=self.bot.lang["ticket_claimed"].format(
-                    user_mention=interaction.user.mention),
-                color=discord.Color.green()
-            )
-            await self.ticket_channel.send(embed=embed)
-
-            await self.bot.ticket_system.ticket_logs.log_ticket_claim(interaction.user, self.ticket_channel)
+        if ticket_data.claimed_by is None:
+            await self.bot.ticket_system.claim_ticket(interaction.channel, interaction.user, interaction)
+        else:
+            await refresh_controls(self.bot, interaction, ticket_data)
 
-        elif ticket_data["claimed_by"] == interaction.user.id:
-            ticket_data["claimed_by"] = None
-            self.bot.ticket_system.save_tickets()
 
-            self.label = self.bot.lang["buttons"]["claim_ticket"]
-            self.style = discord.ButtonStyle.success
+class ReleaseTicketButton(Button):
+    def __init__(self, bot):
+        super().__init__(
+            label=bot.lang["buttons"]["release_ticket"], style=discord.ButtonStyle.secondary,
+            custom_id="tay_tickets:release")
+        self.bot = bot
 
-            embed = discord.Embed(
-                title=self.bot.lang["ticket_released_title"],
-                description=self.bot.lang["ticket_released"].format(
-                    user_mention=interaction.user.mention),
-                color=discord.Color.yellow()
-            )
-            await self.ticket_channel.send(embed=embed)
+    @metrics.timed("ticket_interaction")
+    async def callback(self, interaction: discord.Interaction):
+        ticket_data = await get_ticket_or_reply(self.bot, interaction)
+        if ticket_data is None:
+            return
 
-            await self.bot.ticket_system.ticket_logs.log_ticket_release(interaction.user, self.ticket_channel)
+        if ticket_data.claimed_by == interaction.user.id:
+            await self.bot.ticket_system.release_ticket(interaction.channel, interaction.user, interaction)
         else:
-            await interaction.response.send_message(self.bot.lang["ticket_already_claimed"], ephemeral=True)
-
-        await interaction.message.edit(view=self.view)
+            await refresh_controls(self.bot, interaction, ticket_data)
 
 
 class AddUserButton(Button):
-    def __init__(self, bot, ticket_channel):
+    def __init__(self, bot):
         super().__init__(
-            label=bot.lang["buttons"]["add_user"], style=discord.ButtonStyle.secondary)
+            label=bot.lang["buttons"]["add_user"], style=discord.ButtonStyle.secondary,
+            custom_id="tay_tickets:add_user")
         self.bot = bot
-        self.ticket_channel = ticket_channel
 
+    @metrics.timed("ticket_interaction")
     async def callback(self, interaction: discord.Interaction):
         if not interaction.user.guild_permissions.manage_channels:
             await interaction.response.send_message(self.bot.lang["no_permission"], ephemeral=True)
             return
 
-        modal = AddUserModal(self.bot, self.ticket_channel)
+        modal = AddUserModal(self.bot, interaction.channel)
         await interaction.response.send_modal(modal)
 
 
@@ -217,11 +283,15 @@ class AddUserModal(Modal):
             label=self.bot.lang["user_add_modal_label"], placeholder=self.bot.lang["user_add_modal_placeholder"])
         self.add_item(self.user_id)
 
+    @metrics.timed("ticket_interaction")
     async def on_submit(self, interaction: discord.Interaction, /):
-        user_id = int(self.user_id.value)
-        user = interaction.guild.get_member(user_id)
+        try:
+            user_id = int(self.user_id.value)
+        except ValueError:
+            user_id = None
+        user = await self.bot.member_cache.get(interaction.guild, user_id) if user_id else None
         if user:
-            await self.ticket_channel.set_permissions(user, read_messages=True, send_messages=True)
+            await self.bot.ticket_system.add_to_ticket(self.ticket_channel, user, interaction.user)
             await interaction.response.send_message(self.bot.lang["user_added"].format(user_mention=user.mention))
         else:
             await interaction.response.send_message(self.bot.lang["user_not_found"], ephemeral=True)
@@ -230,33 +300,339 @@ class AddUserModal(Modal):
 class TicketSystem(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.config = load_json('config.json', {})
-        self.tickets = load_json('tickets.json', {})
-        self.tickets_channel_id = int(self.config.get("ticket_channel_id", 0))
-        self.ticket_categories = self.config.get("ticket_categories", {})
-        self.ticket_message = self.config.get(
-            "ticket_message", "Presiona el botón para abrir un ticket.")
-        self.ticket_logs = TicketLogs(bot)
+        config = bot.settings.config
+        self.admission = AdmissionController()
+        self.assignment = AssignmentIndex()
+        self.assigning = {}
+        self.assign_tasks = set()
+        # Canales con un cierre en curso: el ticket sigue registrado mientras se archiva.
+        self.closing = set()
+        self.apply_settings(bot.settings)
+        bot.settings.listeners.append(self.apply_settings)
+        bot.guild_configs.on_evict.append(self.admission.forget)
+        bot.guild_configs.on_evict.append(self.assignment.forget)
+        self.ticket_logs = get_ticket_logs(bot)
+        self.transcripts = TranscriptArchiver(
+            bot.ticket_store,
+            directory=config.get("transcripts_dir", "transcripts"),
+            max_concurrent=config.get("transcript_concurrency", 2),
+            html=config.get("transcript_html", False))
         bot.ticket_system = self
 
-    def save_tickets(self):
-        save_json('tickets.json', self.tickets)
+    def close_delay_for(self, guild_id):
+        # Solo cuenta si el servidor lo sobrescribe; si no, vale el de config.json (self.close_delay).
+        return self.bot.guild_configs.get(guild_id).overrides.get("close_delay_seconds", self.close_delay)
+
+    def apply_settings(self, settings):
+        self.close_delay = settings.config.get("close_delay_seconds", 5)
+        self.admission.configure(
+            max_per_guild=settings.config.get("max_concurrent_creations", 5),
+            max_per_category=settings.config.get("max_concurrent_creations_per_category", 2))
+
+    async def cog_load(self):
+        self.reconcile_task = asyncio.create_task(self.reconcile_tickets())
+        metrics.add_collector(self.collect_metrics)
+
+    async def collect_metrics(self):
+        # Las categorías que ya no tienen tickets vuelven a 0 en lugar de conservar el último valor.
+        samples = [(name, labels, 0)
+                   for name, labels in metrics.gauges if name == "tickets_open"]
+        samples += [("tickets_open", (("category", category),), total)
+                    for category, total in self.bot.ticket_store.count_open_by_category().items()]
+        samples.append(("persistence_queue_depth", (),
+                       self.bot.ticket_store.queue_depth()))
+        samples += [(f"ticket_admission_{key}", (), value)
+                    for key, value in self.admission.stats().items()]
+        samples += [(f"ticket_assignment_{key}", (), value)
+                    for key, value in self.assignment.stats().items()]
+        return samples
+
+    async def reconcile_tickets(self):
+        await self.bot.wait_until_ready()
+        start = time.perf_counter()
+        open_tickets = {
+            ticket.channel_id: ticket for ticket in self.bot.ticket_store.list_open()}
+
+        channels = {}
+        unavailable = set()
+        for guild in self.bot.guilds:
+            if guild.unavailable:
+                # Sin sus canales no podemos distinguir un ticket huérfano de uno que sigue abierto.
+                unavailable.add(guild.id)
+                continue
+            for channel in guild.text_channels:
+                channels[channel.id] = channel
+
+        orphaned = [ticket for channel_id, ticket in open_tickets.items()
+                    if channel_id not in channels and ticket.guild_id not in unavailable]
+        orphaned_ids = {ticket.channel_id for ticket in orphaned}
+        self.assignment.seed(ticket for channel_id, ticket in open_tickets.items()
+                             if channel_id not in orphaned_ids)
+        closed_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')
+        for ticket in orphaned:
+            ticket_store = self.bot.ticket_store.for_guild(ticket.guild_id)
+            # Igual que en _close_ticket: sin el evento de cierre las estadísticas lo darían por abierto.
+            ticket_store.record_event(ticket.channel_id, "close", None)
+            ticket_store.close_ticket(ticket.channel_id, None, closed_at)
+
+        adopted = 0
+        for channel in channels.values():
+            ticket_store = self.bot.ticket_store.for_guild(channel.guild.id)
+            ticket = open_tickets.get(channel.id)
+            if ticket is not None:
+                if ticket.guild_id is None:
+                    ticket_store.update(channel.id, guild_id=channel.guild.id)
+                continue
+            category = self.bot.guild_configs.get(
+                channel.guild.id).category_ids.get(channel.category_id)
+            if category is None or not channel.name.startswith("ticket-"):
+                continue
+            opened_by = next((target.id for target in channel.overwrites
+                              if not isinstance(target, discord.Role) and target.id != channel.guild.me.id), None)
+            ticket_store.open_ticket(Ticket(
+                channel_id=channel.id,
+                guild_id=channel.guild.id,
+                name=channel.name,
+                opened_by=opened_by,
+                category=category,
+                opened_at=channel.created_at.strftime('%Y-%m-%d %H:%M:%S UTC')
+            ))
+            ticket_store.record_event(
+                channel.id, "open", opened_by, at=channel.created_at.timestamp())
+            self.bot.dispatch("ticket_opened", channel, category)
+            adopted += 1
+
+        await self.bot.ticket_store.flush()
+        requeued = await self.requeue_unassigned(open_tickets, channels)
+        print(f"🔄 Tickets sincronizados en {(time.perf_counter() - start) * 1000:.0f} ms: "
+              f"{len(open_tickets) - len(orphaned)} activos, {len(orphaned)} archivados, {adopted} recuperados, {requeued} en reparto automático")
+        print(f"🚀 Arranque completado en {time.perf_counter() - self.bot.launch_time:.2f}s")
+
+    async def requeue_unassigned(self, open_tickets, channels):
+        # La cola de espera solo vive en memoria: tras reiniciar se reconstruye con los tickets sin reclamar.
+        requeued = 0
+        for channel_id, ticket in sorted(open_tickets.items()):
+            channel = channels.get(channel_id)
+            if channel is None or ticket.claimed_by is not None:
+                continue
+            category_data = self.bot.guild_configs.get(
+                channel.guild.id).ticket_categories.get(ticket.category, {})
+            if not category_data.get("auto_assign"):
+                continue
+            requeued += 1
+            assignee = self.auto_assign(channel, ticket.category, category_data)
+            if assignee is not None:
+                await self.claim_ticket(channel, assignee)
+        return requeued
+
+    def staff_pool(self, guild, category, category_data):
+        key = (guild.id, category)
+        role_id = int(category_data["support_role_id"])
+        weights = {int(staff_id): weight for staff_id,
+                   weight in category_data.get("assign_weights", {}).items()}
+        max_load = category_data.get("max_tickets_per_staff")
+        config = (category_data["auto_assign"], role_id, tuple(sorted(weights.items())), max_load)
+        pool = self.assignment.pools.get(key)
+        if pool is None or pool.config != config:
+            # El rol se recorre solo al crear el grupo; después lo mantiene on_member_update.
+            role = guild.get_role(role_id)
+            members = [member.id for member in role.members if not member.bot] if role else []
+            pool = self.assignment.build_pool(
+                key, config, category_data["auto_assign"], role_id, members, weights, max_load)
+        return key, pool
+
+    def is_available(self, guild, role_id, staff_id):
+        member = guild.get_member(staff_id)
+        if member is None or member.get_role(role_id) is None:
+            return False
+        # Sin el intent de presencias todos aparecen desconectados: entonces no se filtra por estado.
+        return not self.bot.intents.presences or member.status != discord.Status.offline
+
+    def pick_assignee(self, ticket_channel, category, category_data):
+        guild = ticket_channel.guild
+        key, pool = self.staff_pool(guild, category, category_data)
+        staff_id = self.assignment.pick(
+            key, lambda staff_id: self.is_available(guild, pool.role_id, staff_id))
+        if staff_id is None:
+            return None
+        # Se reserva ya: otra creación simultánea debe ver la carga actualizada.
+        self.assignment.claim(guild.id, ticket_channel.id, staff_id)
+        self.assignment.assigned += 1
+        return guild.get_member(staff_id)
+
+    def auto_assign(self, ticket_channel, category, category_data):
+        labels = (("strategy", category_data["auto_assign"]),)
+        start = time.perf_counter()
+        assignee = self.pick_assignee(ticket_channel, category, category_data)
+        metrics.observe("ticket_assignment_seconds", time.perf_counter() - start, labels)
+        if assignee is not None:
+            metrics.inc("ticket_assignments_total", labels + (("result", "assigned"),))
+            metrics.observe("ticket_assignment_wait_seconds", 0.0, labels)
+            return assignee
+        key, pool = self.staff_pool(ticket_channel.guild, category, category_data)
+        if pool.members:
+            # Sin nadie disponible el ticket espera a que alguien libere uno o se conecte.
+            pool.waiting.append((ticket_channel.id, time.monotonic()))
+            self.assignment.queued += 1
+            metrics.inc("ticket_assignments_total", labels + (("result", "queued"),))
+        return None
+
+    def wake_waiting(self, guild):
+        if not self.assignment.waiting(guild.id):
+            return
+        if guild.id in self.assigning:
+            # Ya hay un reparto en curso: se repetirá al terminar por si este cambio libera hueco.
+            self.assigning[guild.id] = True
+            return
+        self.assigning[guild.id] = False
+        task = asyncio.create_task(self.assign_waiting(guild))
+        self.assign_tasks.add(task)
+        task.add_done_callback(self.assign_tasks.discard)
+
+    async def assign_waiting(self, guild):
+        try:
+            while True:
+                self.assigning[guild.id] = False
+                await self.assign_waiting_once(guild)
+                if not self.assigning[guild.id]:
+                    break
+        finally:
+            del self.assigning[guild.id]
+
+    async def assign_waiting_once(self, guild):
+        ticket_categories = self.bot.guild_configs.get(guild.id).ticket_categories
+        ticket_store = self.bot.ticket_store.for_guild(guild.id)
+        for (guild_id, category), pool in list(self.assignment.pools.items()):
+            category_data = ticket_categories.get(category, {})
+            if guild_id != guild.id or not category_data.get("auto_assign"):
+                continue
+            while pool.waiting:
+                channel_id, queued_at = pool.waiting[0]
+                channel = guild.get_channel(channel_id)
+                ticket = ticket_store.get(channel_id)
+                if channel is None or ticket is None or ticket.claimed_by is not None:
+                    pool.waiting.popleft()
+                    continue
+                assignee = self.pick_assignee(channel, category, category_data)
+                if assignee is None:
+                    break
+                pool.waiting.popleft()
+                labels = (("strategy", category_data["auto_assign"]),)
+                metrics.inc("ticket_assignments_total", labels + (("result", "assigned"),))
+                metrics.observe("ticket_assignment_wait_seconds",
+                                time.monotonic() - queued_at, labels)
+                try:
+                    await self.claim_ticket(channel, assignee)
+                except discord.HTTPException as e:
+                    # El ticket ya consta como reclamado; solo falló el aviso. Se sigue con la cola.
+                    print(f"⚠️ Error al asignar el ticket {channel_id} a {assignee}: {e}")
+
+    async def claim_ticket(self, ticket_channel, user, interaction=None):
+        ticket_store = self.bot.ticket_store.for_guild(ticket_channel.guild.id)
+        ticket_store.update(ticket_channel.id, claimed_by=user.id)
+        self.assignment.claim(ticket_channel.guild.id, ticket_channel.id, user.id)
+        ticket_store.record_event(ticket_channel.id, "claim", user.id)
+        if interaction is not None:
+            view = TicketControlView(self.bot, claimed=True)
+            await interaction.response.edit_message(view=view)
+            view.stop()
 
-    async def send_ticket_message(self):
-        await asyncio.sleep(5)
-        channel = self.bot.get_channel(self.tickets_channel_id)
-        if channel:
-            await channel.purge(limit=10)
-            view = View()
-            view.add_item(TicketButton(self.bot, self.ticket_categories))
-            embed = discord.Embed(title=self.bot.lang["ticket_system_title"],
-                                  description=self.bot.lang["ticket_system_description"], color=discord.Color.blue())
-            await channel.send(embed=embed, view=view)
+        embed = discord.Embed(
+            title=self.bot.lang["ticket_claimed_title"],
+            description=self.bot.lang["ticket_claimed"].format(
+                user_mention=user.mention),
+            color=discord.Color.green()
+        )
+        await ticket_channel.send(embed=embed)
+
+        await self.ticket_logs.log_ticket_claim(user, ticket_channel)
+
+    async def release_ticket(self, ticket_channel, user, interaction=None):
+        ticket_store = self.bot.ticket_store.for_guild(ticket_channel.guild.id)
+        ticket = ticket_store.get(ticket_channel.id)
+        # Las estadísticas por staff cuentan la liberación a quien tenía el ticket, no a quien la hace
+        # (un administrador en las operaciones masivas).
+        released_by = ticket.claimed_by if ticket is not None and ticket.claimed_by is not None else user.id
+        ticket_store.update(ticket_channel.id, claimed_by=None)
+        ticket_store.record_event(ticket_channel.id, "release", released_by)
+        self.assignment.release(ticket_channel.id)
+        if interaction is not None:
+            view = TicketControlView(self.bot, claimed=False)
+            await interaction.response.edit_message(view=view)
+            view.stop()
+
+        embed = discord.Embed(
+            title=self.bot.lang["ticket_released_title"],
+            description=self.bot.lang["ticket_released"].format(
+                user_mention=user.mention),
+            color=discord.Color.yellow()
+        )
+        await ticket_channel.send(embed=embed)
+
+        await self.ticket_logs.log_ticket_release(user, ticket_channel)
+        self.wake_waiting(ticket_channel.guild)
+
+    async def add_to_ticket(self, ticket_channel, target, user):
+        # target puede ser un miembro o un rol; user es quien lo añade.
+        await ticket_channel.set_permissions(target, read_messages=True, send_messages=True)
+        self.bot.ticket_store.for_guild(ticket_channel.guild.id).record_event(
+            ticket_channel.id, "add_user", user.id)
+
+    async def close_ticket(self, ticket_channel, user, delay=None):
+        # Dos clics, o un clic y el cierre automático o masivo, no deben archivar ni borrar dos veces.
+        if ticket_channel.id in self.closing:
+            return False
+        self.closing.add(ticket_channel.id)
+        try:
+            return await self._close_ticket(ticket_channel, user, delay)
+        finally:
+            self.closing.discard(ticket_channel.id)
+
+    async def _close_ticket(self, ticket_channel, user, delay):
+        try:
+            # El aviso de cierre corre en paralelo con el archivado; el borrado espera a ambos.
+            await asyncio.gather(asyncio.sleep(self.close_delay_for(ticket_channel.guild.id) if delay is None else delay),
+                                 self.transcripts.archive(ticket_channel, ticket_channel.id))
+        except (discord.HTTPException, OSError) as e:
+            print(f"⚠️ Error al archivar la transcripción de {ticket_channel.name}: {e}")
+            try:
+                await ticket_channel.send(self.bot.lang["transcript_failed"])
+            except discord.HTTPException:
+                # Si el canal ya no existe no hay dónde avisar; reconcile_tickets lo archivará.
+                pass
+            return False
+        await self.ticket_logs.log_ticket_closure(user, ticket_channel)
+        ticket_store = self.bot.ticket_store.for_guild(ticket_channel.guild.id)
+        # El evento va antes del cierre: se rellena con la fila del ticket, que close_ticket borra.
+        ticket_store.record_event(ticket_channel.id, "close", user.id)
+        ticket_store.close_ticket(
+            ticket_channel.id, user.id, datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC'))
+        self.bot.dispatch("ticket_closed", ticket_channel.id)
+        if self.assignment.release(ticket_channel.id) is not None:
+            self.wake_waiting(ticket_channel.guild)
+        await ticket_channel.delete()
+        return True
+
+    async def send_ticket_message(self, channel):
+        await channel.purge(limit=10)
+        view = TicketPanelView(self.bot)
+        embed = discord.Embed(title=self.bot.lang["ticket_system_title"],
+                              description=self.bot.lang["ticket_system_description"], color=discord.Color.blue())
+        await channel.send(embed=embed, view=view)
+        view.stop()
 
     @commands.command(name="setup_tickets")
-    async def setup_tickets(self, ctx):
+    @commands.guild_only()
+    async def setup_tickets(self, ctx, channel: discord.TextChannel = None):
         if ctx.author.guild_permissions.administrator:
-            await self.send_ticket_message()
+            guild_config = self.bot.guild_configs.get(ctx.guild.id)
+            # guild.get_channel descarta el canal por defecto de config.json si es de otro servidor.
+            channel = channel or ctx.guild.get_channel(
+                guild_config.ticket_channel_id) or ctx.channel
+            if channel.id != guild_config.ticket_channel_id:
+                self.bot.guild_configs.update(
+                    ctx.guild.id, ticket_channel_id=str(channel.id))
+            await self.send_ticket_message(channel)
             embed = discord.Embed(title=self.bot.lang["setup_complete_title"],
                                   description=self.bot.lang["setup_complete"],
                                   color=discord.Color.green()
@@ -270,10 +646,143 @@ class TicketSystem(commands.Cog):
             )
             await ctx.send(embed=embed)
 
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        if before.roles != after.roles and self.assignment.update_member(
+                after.guild.id, after.id, {role.id for role in after.roles}):
+            self.wake_waiting(after.guild)
+
+    @commands.Cog.listener()
+    async def on_presence_update(self, before, after):
+        if (before.status == discord.Status.offline and after.status != discord.Status.offline
+                and (after.guild.id, after.id) in self.assignment.pools_by_staff):
+            self.wake_waiting(after.guild)
+
+    @commands.command(name="ticket_load")
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def ticket_load(self, ctx):
+        lines = [self.bot.lang["load_stats_line"].format(staff_id=staff_id, tickets=tickets)
+                 for staff_id, tickets in self.assignment.guild_loads(ctx.guild.id)[:20]]
+        embed = discord.Embed(title=self.bot.lang["load_stats_title"],
+                              description="\n".join(lines) or self.bot.lang["load_stats_empty"],
+                              color=discord.Color.blue()
+                              )
+        embed.set_footer(text=self.bot.lang["load_stats_waiting"].format(
+            waiting=self.assignment.waiting(ctx.guild.id)))
+        await ctx.send(embed=embed)
+
+    @commands.command(name="ticket_storage")
+    @commands.has_permissions(administrator=True)
+    async def ticket_storage(self, ctx):
+        embed = discord.Embed(title=self.bot.lang["storage_stats_title"],
+                              description=self.bot.lang["storage_stats"].format(
+                                  **await self.bot.ticket_store.stats()),
+                              color=discord.Color.blue()
+                              )
+        await ctx.send(embed=embed)
+
+    @commands.command(name="ticket_logs")
+    @commands.has_permissions(administrator=True)
+    async def ticket_logs_stats(self, ctx):
+        embed = discord.Embed(title=self.bot.lang["log_stats_title"],
+                              description=self.bot.lang["log_stats"].format(
+                                  **self.ticket_logs.stats()),
+                              color=discord.Color.blue()
+                              )
+        await ctx.send(embed=embed)
+
+    @commands.command(name="ticket_history")
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def ticket_history(self, ctx, user: discord.User):
+        ticket_store = self.bot.ticket_store.for_guild(ctx.guild.id)
+        tickets = await ticket_store.list_closed_by_opener(ctx.guild.id, user.id)
+        lines = [self.bot.lang["ticket_history_line"].format(
+            ticket_id=ticket["channel_id"], name=ticket["name"], category=ticket["category"],
+            closed_at=ticket["closed_at"]) for ticket in tickets]
+        embed = discord.Embed(title=self.bot.lang["ticket_history_title"].format(user=user.display_name),
+                              description="\n".join(lines) or self.bot.lang["ticket_history_empty"],
+                              color=discord.Color.blue())
+        await ctx.send(embed=embed)
+
+    @commands.command(name="ticket_transcript")
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def ticket_transcript(self, ctx, ticket_id: int):
+        transcript = await self.bot.ticket_store.for_guild(ctx.guild.id).get_transcript(ctx.guild.id, ticket_id)
+        # El HTML se abre directamente en el navegador; si no se generó, va el JSONL comprimido.
+        path = transcript and (transcript["html_path"] or transcript["path"])
+        if not path or not os.path.exists(path):
+            await ctx.send(self.bot.lang["transcript_not_found"])
+            return
+        if os.path.getsize(path) > MAX_ATTACHMENT_BYTES:
+            await ctx.send(self.bot.lang["transcript_too_large"].format(path=path))
+            return
+        await ctx.send(self.bot.lang["transcript_found"].format(
+            ticket_id=ticket_id, messages=transcript["message_count"]), file=discord.File(path))
+
+    @commands.command(name="ticket_memory")
+    @commands.has_permissions(administrator=True)
+    async def ticket_memory(self, ctx):
+        # ru_maxrss es el pico de memoria en KiB (Linux); no existe en Windows.
+        peak_rss = f"{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB" if resource else "N/A"
+        embed = discord.Embed(title=self.bot.lang["memory_stats_title"],
+                              description=self.bot.lang["memory_stats"].format(
+                                  peak_rss=peak_rss,
+                                  guilds=len(self.bot.guilds),
+                                  channels=sum(len(guild.channels)
+                                               for guild in self.bot.guilds),
+                                  members=sum(len(guild.members)
+                                              for guild in self.bot.guilds),
+                                  users=len(self.bot.users),
+                                  messages=len(self.bot.cached_messages),
+                                  open_tickets=self.bot.ticket_store.count_open(),
+                                  views=len(self.bot.persistent_views),
+                                  **{f"guild_configs_{key}": value for key, value in self.bot.guild_configs.stats().items()},
+                                  **{f"member_cache_{key}": value for key, value in self.bot.member_cache.stats().items()}),
+                              color=discord.Color.blue()
+                              )
+        await ctx.send(embed=embed)
+
+    @commands.command(name="ticket_perf")
+    @commands.has_permissions(administrator=True)
+    async def ticket_perf(self, ctx):
+        await metrics.collect()
+        embed = discord.Embed(title=self.bot.lang["perf_stats_title"],
+                              color=discord.Color.blue())
+        for title_key, prefix in (("perf_interactions", "ticket_interaction_seconds"),
+                                  ("perf_logs", "ticket_log_seconds"),
+                                  ("perf_rest", "discord_rest_seconds"),
+                                  ("perf_persistence", "persistence_flush_seconds")):
+            histograms = sorted(((labels, histogram) for (name, labels), histogram in metrics.histograms.items()
+                                 if name == prefix), key=lambda item: -item[1].count)[:8]
+            lines = [self.bot.lang["perf_line"].format(
+                name=dict(labels).get("callback") or dict(labels).get(
+                    "route") or dict(labels).get("store"),
+                count=histogram.count,
+                avg_ms=histogram.total / histogram.count * 1000,
+                p99_ms=histogram.quantile(0.99) * 1000) for labels, histogram in histograms]
+            embed.add_field(name=self.bot.lang[title_key],
+                            value="\n".join(lines) or "-", inline=False)
+        embed.add_field(name=self.bot.lang["perf_loop_lag"],
+                        value=f"{metrics.gauges.get(('event_loop_lag_seconds', ()), 0.0) * 1000:.1f} ms", inline=True)
+        embed.add_field(name=self.bot.lang["perf_rate_limits"],
+                        value=str(sum(value for (name, _), value in metrics.counters.items()
+                                      if name == "discord_rate_limited_total")), inline=True)
+        await ctx.send(embed=embed)
+
+    async def cog_unload(self):
+        for task in self.assign_tasks:
+            task.cancel()
+        await self.bot.ticket_store.flush()
+
 
 async def setup(bot):
     print("🔁 Cargando el sistema de tickets...")
-    ticket_system = TicketSystem(bot)
-    await bot.add_cog(ticket_system)
-    await ticket_system.send_ticket_message()
+    await bot.add_cog(TicketSystem(bot))
+    bot.add_view(TicketPanelView(bot))
+    # Cada botón hace siempre lo que indica: se registran las dos variantes del panel de control.
+    bot.add_view(TicketControlView(bot))
+    bot.add_view(TicketControlView(bot, claimed=True))
     print("✅ Sistema de tickets cargado correctamente.")
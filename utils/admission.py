@@ -0,0 +1,91 @@
+import asyncio
+import contextlib
+
+
+class AdmissionController:
+    def __init__(self, max_per_guild=5, max_per_category=2):
+        self.max_per_guild = max_per_guild
+        self.max_per_category = max_per_category
+        self.in_flight = set()
+        self.semaphores = {}
+        self.active = {}
+        self.waiting = {}
+        self.admitted = 0
+        self.deduplicated = 0
+        self.queued = 0
+
+    def try_begin(self, guild_id, user_id):
+        key = (guild_id, user_id)
+        if key in self.in_flight:
+            self.deduplicated += 1
+            return False
+        self.in_flight.add(key)
+        return True
+
+    def end(self, guild_id, user_id):
+        self.in_flight.discard((guild_id, user_id))
+
+    def _semaphore(self, key, limit):
+        semaphore = self.semaphores.get(key)
+        if semaphore is None:
+            semaphore = self.semaphores[key] = asyncio.Semaphore(limit)
+        return semaphore
+
+    @contextlib.asynccontextmanager
+    async def slot(self, guild_id, category, on_queued=None):
+        guild_semaphore = self._semaphore(("guild", guild_id), self.max_per_guild)
+        category_semaphore = self._semaphore(
+            ("category", guild_id, category), self.max_per_category)
+        waiting = guild_semaphore.locked() or category_semaphore.locked()
+        try:
+            if waiting:
+                self.queued += 1
+                self.waiting[guild_id] = self.waiting.get(guild_id, 0) + 1
+                if on_queued is not None:
+                    await on_queued(self.waiting[guild_id])
+            # Primero la categoría: esperar en una categoría llena no ocupa hueco del servidor.
+            async with category_semaphore, guild_semaphore:
+                if waiting:
+                    waiting = False
+                    self.waiting[guild_id] -= 1
+                self.admitted += 1
+                key = (guild_id, category)
+                self.active[key] = self.active.get(key, 0) + 1
+                try:
+                    yield
+                finally:
+                    self.active[key] -= 1
+        finally:
+            if waiting:
+                self.waiting[guild_id] -= 1
+
+    def creating(self, guild_id, category):
+        return self.active.get((guild_id, category), 0)
+
+    def configure(self, max_per_guild, max_per_category):
+        self.max_per_guild = max_per_guild
+        self.max_per_category = max_per_category
+        # Los semáforos libres se recrean con los nuevos límites; los de servidores con creaciones en
+        # curso mantienen el anterior hasta que el servidor quede inactivo.
+        for guild_id in {key[1] for key in self.semaphores}:
+            self.forget(guild_id)
+
+    def forget(self, guild_id):
+        # Libera los semáforos de un servidor inactivo; si hay creaciones en curso se conservan.
+        if self.waiting.get(guild_id) or any(count for (active_guild, _), count in self.active.items()
+                                             if active_guild == guild_id):
+            return
+        self.waiting.pop(guild_id, None)
+        for key in [key for key in self.semaphores if key[1] == guild_id]:
+            del self.semaphores[key]
+        for key in [key for key in self.active if key[0] == guild_id]:
+            del self.active[key]
+
+    def stats(self):
+        return {
+            "in_flight": len(self.in_flight),
+            "waiting": sum(self.waiting.values()),
+            "admitted": self.admitted,
+            "deduplicated": self.deduplicated,
+            "queued": self.queued,
+        }
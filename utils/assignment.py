@@ -0,0 +1,171 @@
+import collections
+import heapq
+import itertools
+
+STRATEGIES = ("least_loaded", "round_robin", "weighted")
+
+
+class StaffPool:
+    def __init__(self, config, strategy, role_id, weights=None, max_load=None):
+        self.config = config
+        self.strategy = strategy
+        self.role_id = role_id
+        self.weights = weights or {}
+        self.max_load = max_load
+        self.members = set()
+        # Montículo por carga con invalidación perezosa: solo vale la entrada que coincide con entries.
+        self.heap = []
+        self.entries = {}
+        self.rotation = collections.deque()
+        self.waiting = collections.deque()
+
+    def weight(self, staff_id):
+        return self.weights.get(staff_id, 1) if self.strategy == "weighted" else 1
+
+
+class AssignmentIndex:
+    def __init__(self):
+        self.claims = {}
+        self.loads = collections.Counter()
+        self.pools = {}
+        self.pools_by_staff = collections.defaultdict(set)
+        self.seq = itertools.count()
+        self.assigned = 0
+        self.queued = 0
+
+    def seed(self, tickets):
+        self.claims.clear()
+        self.loads.clear()
+        for ticket in tickets:
+            if ticket.claimed_by is not None and ticket.guild_id is not None:
+                self.claims[ticket.channel_id] = (ticket.guild_id, ticket.claimed_by)
+                self.loads[(ticket.guild_id, ticket.claimed_by)] += 1
+        for key, pool in self.pools.items():
+            for staff_id in pool.members:
+                self._push(key, pool, staff_id)
+
+    def _push(self, key, pool, staff_id):
+        entry = (self.loads[(key[0], staff_id)] / pool.weight(staff_id), next(self.seq), staff_id)
+        pool.entries[staff_id] = entry
+        heapq.heappush(pool.heap, entry)
+        if len(pool.heap) > 2 * len(pool.entries) + 32:
+            # Demasiadas entradas obsoletas: se reconstruye con las vigentes.
+            pool.heap = list(pool.entries.values())
+            heapq.heapify(pool.heap)
+
+    def build_pool(self, key, config, strategy, role_id, members, weights=None, max_load=None):
+        previous = self.pools.get(key)
+        if previous is not None:
+            for staff_id in list(previous.members):
+                self.remove_member(key, staff_id)
+        pool = self.pools[key] = StaffPool(config, strategy, role_id, weights, max_load)
+        if previous is not None:
+            pool.waiting = previous.waiting
+        for staff_id in members:
+            self.add_member(key, staff_id)
+        return pool
+
+    def add_member(self, key, staff_id):
+        pool = self.pools[key]
+        if staff_id in pool.members:
+            return
+        pool.members.add(staff_id)
+        pool.rotation.append(staff_id)
+        self.pools_by_staff[(key[0], staff_id)].add(key)
+        self._push(key, pool, staff_id)
+
+    def remove_member(self, key, staff_id):
+        # Su entrada en el montículo se descarta al salir; los cambios de rol son poco frecuentes.
+        pool = self.pools[key]
+        if staff_id not in pool.members:
+            return
+        pool.members.discard(staff_id)
+        pool.entries.pop(staff_id, None)
+        pool.rotation.remove(staff_id)
+        pools = self.pools_by_staff.get((key[0], staff_id))
+        if pools is not None:
+            pools.discard(key)
+            if not pools:
+                del self.pools_by_staff[(key[0], staff_id)]
+
+    def update_member(self, guild_id, staff_id, role_ids):
+        added = False
+        for key, pool in self.pools.items():
+            if key[0] != guild_id:
+                continue
+            if pool.role_id in role_ids:
+                added = added or staff_id not in pool.members
+                self.add_member(key, staff_id)
+            elif staff_id in pool.members:
+                self.remove_member(key, staff_id)
+        return added
+
+    def forget(self, guild_id):
+        # Los grupos con tickets en espera se conservan para no perderlos.
+        for key in [key for key, pool in self.pools.items() if key[0] == guild_id and not pool.waiting]:
+            for staff_id in list(self.pools[key].members):
+                self.remove_member(key, staff_id)
+            del self.pools[key]
+
+    def _load_changed(self, guild_id, staff_id):
+        for key in self.pools_by_staff.get((guild_id, staff_id), ()):
+            self._push(key, self.pools[key], staff_id)
+
+    def claim(self, guild_id, channel_id, staff_id):
+        if self.claims.get(channel_id) == (guild_id, staff_id):
+            return
+        self.release(channel_id)
+        self.claims[channel_id] = (guild_id, staff_id)
+        self.loads[(guild_id, staff_id)] += 1
+        self._load_changed(guild_id, staff_id)
+
+    def release(self, channel_id):
+        claim = self.claims.pop(channel_id, None)
+        if claim is None:
+            return None
+        self.loads[claim] -= 1
+        if not self.loads[claim]:
+            del self.loads[claim]
+        self._load_changed(*claim)
+        return claim
+
+    def has_capacity(self, pool, guild_id, staff_id):
+        return pool.max_load is None or self.loads[(guild_id, staff_id)] < pool.max_load
+
+    def pick(self, key, available):
+        pool = self.pools[key]
+        if pool.strategy == "round_robin":
+            for _ in range(len(pool.rotation)):
+                staff_id = pool.rotation[0]
+                pool.rotation.rotate(-1)
+                if self.has_capacity(pool, key[0], staff_id) and available(staff_id):
+                    return staff_id
+            return None
+
+        # O(log n) por entrada: solo se recorren más si el primero no está disponible o está lleno.
+        skipped = []
+        picked = None
+        while pool.heap:
+            entry = heapq.heappop(pool.heap)
+            staff_id = entry[2]
+            if pool.entries.get(staff_id) is not entry:
+                continue
+            skipped.append(entry)
+            if self.has_capacity(pool, key[0], staff_id) and available(staff_id):
+                picked = staff_id
+                break
+        for entry in skipped:
+            heapq.heappush(pool.heap, entry)
+        return picked
+
+    def guild_loads(self, guild_id):
+        return sorted(((staff_id, load) for (load_guild, staff_id), load in self.loads.items()
+                       if load_guild == guild_id), key=lambda item: -item[1])
+
+    def waiting(self, guild_id=None):
+        return sum(len(pool.waiting) for key, pool in self.pools.items()
+                   if guild_id is None or key[0] == guild_id)
+
+    def stats(self):
+        return {"staff": len(self.loads), "claimed": len(self.claims), "pools": len(self.pools),
+                "waiting": self.waiting(), "assigned": self.assigned, "queued": self.queued}
@@ -0,0 +1,109 @@
+import asyncio
+import time
+from utils.metrics import metrics
+
+ACTIONS = ("close", "archive", "release", "reassign", "add")
+
+
+def rate_limited_total():
+    return sum(value for (name, _), value in metrics.counters.items()
+               if name == "discord_rate_limited_total")
+
+
+class BulkJob:
+    def __init__(self, guild_id, action, channel_ids, target_id=None, created_by=None, job_id=None,
+                 cursor=0, done=0, skipped=0, failed=0, status="running",
+                 progress_channel_id=None, progress_message_id=None):
+        self.job_id = job_id
+        self.guild_id = guild_id
+        self.action = action
+        self.channel_ids = channel_ids
+        self.target_id = target_id
+        self.created_by = created_by
+        # Todos los tickets anteriores a cursor están procesados; los posteriores pueden estarlo o no.
+        self.cursor = cursor
+        self.done = done
+        self.skipped = skipped
+        self.failed = failed
+        self.status = status
+        self.progress_channel_id = progress_channel_id
+        self.progress_message_id = progress_message_id
+        self.cancelled = False
+
+    @property
+    def total(self):
+        return len(self.channel_ids)
+
+    @property
+    def processed(self):
+        return self.done + self.skipped + self.failed
+
+    def progress(self):
+        return {"cursor": self.cursor, "done": self.done, "skipped": self.skipped,
+                "failed": self.failed, "status": self.status}
+
+
+class BulkExecutor:
+    def __init__(self, max_concurrent=4, progress_interval=2.0):
+        self.max_concurrent = max_concurrent
+        self.progress_interval = progress_interval
+
+    async def run(self, job, operation, on_progress):
+        # operation(channel_id) devuelve True si hizo algo y False si no había nada que hacer.
+        labels = (("action", job.action),)
+        indexes = iter(range(job.cursor, job.total))
+        finished = set()
+        limit = self.max_concurrent
+        exhausted = False
+        streak = 0
+        rate_limits = rate_limited_total()
+        last_progress = time.monotonic()
+
+        async def worker(slot):
+            nonlocal limit, exhausted, streak, rate_limits, last_progress
+            while not job.cancelled:
+                if slot >= limit:
+                    # Trabajador por encima del límite actual: espera a que vuelva a crecer.
+                    if exhausted:
+                        return
+                    await asyncio.sleep(1)
+                    continue
+                index = next(indexes, None)
+                if index is None:
+                    exhausted = True
+                    return
+                start = time.perf_counter()
+                try:
+                    result = "done" if await operation(job.channel_ids[index]) else "skipped"
+                except Exception as e:
+                    result = "failed"
+                    print(f"⚠️ Error en la operación masiva #{job.job_id} sobre el canal "
+                          f"{job.channel_ids[index]}: {e}")
+                setattr(job, result, getattr(job, result) + 1)
+                metrics.observe("ticket_bulk_item_seconds", time.perf_counter() - start, labels)
+                metrics.inc("ticket_bulk_items_total", labels + (("result", result),))
+
+                finished.add(index)
+                while job.cursor in finished:
+                    finished.remove(job.cursor)
+                    job.cursor += 1
+
+                # Discord comparte algunos límites entre canales del mismo servidor (crear y borrar
+                # canales): ante un 429 la concurrencia se reduce a la mitad y se recupera de uno en uno.
+                current = rate_limited_total()
+                if current > rate_limits:
+                    limit, streak = max(1, limit // 2), 0
+                elif limit < self.max_concurrent:
+                    streak += 1
+                    if streak >= limit * 4:
+                        limit, streak = limit + 1, 0
+                rate_limits = current
+
+                if time.monotonic() - last_progress >= self.progress_interval:
+                    last_progress = time.monotonic()
+                    await on_progress(job)
+
+        await asyncio.gather(*(worker(slot) for slot in range(self.max_concurrent)))
+        job.status = "cancelled" if job.cancelled else "finished"
+        await on_progress(job)
+        return job
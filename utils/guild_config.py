@@ -0,0 +1,128 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from utils.settings import validate_config
+
+# Claves que se leen por servidor; el resto de config.json es común a todos.
+GUILD_KEYS = ("ticket_channel_id", "log_channel_id", "log_webhook_url", "ticket_categories",
+              "bot_prefix", "close_delay_seconds")
+
+
+def load_json(file, default_data=None):
+    try:
+        with open(file, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default_data if default_data is not None else {}
+
+
+class GuildConfig:
+    def __init__(self, guild_id, defaults, overrides, mtime=None):
+        self.guild_id = guild_id
+        self.overrides = overrides
+        self.mtime = mtime
+        self.data = dict(defaults, **overrides)
+        self.ticket_channel_id = int(self.data.get("ticket_channel_id", 0))
+        self.log_channel_id = int(self.data.get("log_channel_id", 0))
+        self.ticket_categories = self.data.get("ticket_categories", {})
+        self.category_ids = {}
+        for category, category_data in self.ticket_categories.items():
+            self.category_ids.setdefault(
+                int(category_data["category_id"]), category)
+        self.last_used = time.monotonic()
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+
+class GuildConfigs:
+    def __init__(self, defaults, directory='guilds', idle_seconds=1800):
+        self.defaults = defaults
+        self.directory = directory
+        self.idle_seconds = idle_seconds
+        # Ordenado por último uso: los servidores inactivos quedan siempre al principio.
+        self.partitions = OrderedDict()
+        self.on_evict = []
+        self.on_reload = []
+        self.loads = 0
+        self.evictions = 0
+
+    def path(self, guild_id):
+        return os.path.join(self.directory, f"{guild_id}.json")
+
+    def load(self, guild_id):
+        try:
+            mtime = os.stat(self.path(guild_id)).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        overrides = load_json(self.path(guild_id), {})
+        ignored = sorted(set(overrides) - set(GUILD_KEYS)) if isinstance(overrides, dict) else []
+        if ignored:
+            print(f"⚠️ El servidor {guild_id} define claves que solo se leen de config.json: {', '.join(ignored)}")
+        try:
+            validate_config(dict(self.defaults, **overrides))
+        except ValueError as e:
+            print(f"⚠️ Configuración del servidor {guild_id} no válida, se usa la de config.json: {e}")
+            overrides = {}
+        return GuildConfig(guild_id, self.defaults, overrides, mtime)
+
+    def get(self, guild_id):
+        now = time.monotonic()
+        partition = self.partitions.get(guild_id)
+        if partition is None:
+            partition = self.partitions[guild_id] = self.load(guild_id)
+            self.loads += 1
+        else:
+            self.partitions.move_to_end(guild_id)
+            partition.last_used = now
+        self.evict_idle(now)
+        return partition
+
+    def evict_idle(self, now=None):
+        now = time.monotonic() if now is None else now
+        while self.partitions:
+            guild_id, partition = next(iter(self.partitions.items()))
+            if now - partition.last_used < self.idle_seconds:
+                break
+            del self.partitions[guild_id]
+            self.evictions += 1
+            for callback in self.on_evict:
+                callback(guild_id)
+
+    def replace(self, guild_id, partition):
+        # Reasignar la clave conserva su posición en el orden de uso.
+        partition.last_used = self.partitions[guild_id].last_used
+        self.partitions[guild_id] = partition
+        for callback in self.on_reload:
+            callback(guild_id)
+
+    def set_defaults(self, defaults):
+        self.defaults = defaults
+        for guild_id, partition in list(self.partitions.items()):
+            self.replace(guild_id, GuildConfig(
+                guild_id, defaults, partition.overrides, partition.mtime))
+
+    def reload_changed(self):
+        for guild_id, partition in list(self.partitions.items()):
+            try:
+                mtime = os.stat(self.path(guild_id)).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if mtime != partition.mtime:
+                self.replace(guild_id, self.load(guild_id))
+
+    def update(self, guild_id, **fields):
+        overrides = dict(load_json(self.path(guild_id), {}), **fields)
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_file = f"{self.path(guild_id)}.tmp"
+        with open(tmp_file, 'w', encoding="utf-8") as f:
+            json.dump(overrides, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_file, self.path(guild_id))
+        self.partitions[guild_id] = GuildConfig(
+            guild_id, self.defaults, overrides, os.stat(self.path(guild_id)).st_mtime_ns)
+        self.partitions.move_to_end(guild_id)
+        return self.partitions[guild_id]
+
+    def stats(self):
+        return {"loaded": len(self.partitions), "loads": self.loads, "evictions": self.evictions}
@@ -0,0 +1,154 @@
+import asyncio
+import json
+import os
+import discord
+
+MAX_EMBEDS_PER_MESSAGE = 10
+
+
+class LogQueue:
+    def __init__(self, bot, get_channel, webhook_url=None, batch_size=10, flush_interval=2.0,
+                 max_pending=1000, spill_file='logs_spill.jsonl'):
+        self.bot = bot
+        self.get_channel = get_channel
+        self.webhook_url = webhook_url
+        self.batch_size = min(batch_size, MAX_EMBEDS_PER_MESSAGE)
+        self.flush_interval = flush_interval
+        self.spill_file = spill_file
+        self.queue = asyncio.Queue(maxsize=max_pending)
+        self.counters = {"queued": 0, "sent": 0,
+                         "messages": 0, "dropped": 0, "spilled": 0, "replayed": 0}
+        self._webhook = None
+        self._task = None
+        # Lote sacado de la cola y aún sin enviar: close() lo recupera si cancela la tarea.
+        self._batch = []
+
+    def put(self, embed):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        try:
+            self.queue.put_nowait(embed)
+        except asyncio.QueueFull:
+            # Mejor perder un log que bloquear la interacción del usuario.
+            self.counters["dropped"] += 1
+            return
+        self.counters["queued"] += 1
+
+    async def _next_batch(self):
+        batch = self._batch = [await self.queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                sent = await self._send(batch)
+                self._batch = []
+                if sent:
+                    await self._replay_spilled()
+            except Exception as e:
+                # Un error inesperado (webhook mal escrito, fichero dañado...) no debe parar la cola.
+                print(f"⚠️ Error inesperado en la cola de logs: {e}")
+                if self._batch:
+                    self._spill(self._batch)
+                    self._batch = []
+
+    async def _send(self, batch):
+        try:
+            if self.webhook_url:
+                if self._webhook is None:
+                    self._webhook = discord.Webhook.from_url(
+                        self.webhook_url, client=self.bot)
+                await self._webhook.send(embeds=batch)
+            else:
+                channel = self.get_channel()
+                if channel is None:
+                    raise LookupError("canal de logs no disponible")
+                await channel.send(embeds=batch)
+        except (discord.HTTPException, LookupError) as e:
+            print(f"⚠️ No se pudieron enviar {len(batch)} logs: {e}")
+            self._spill(batch)
+            return False
+        self.counters["sent"] += len(batch)
+        self.counters["messages"] += 1
+        return True
+
+    def _spill(self, batch):
+        try:
+            with open(self.spill_file, 'a', encoding="utf-8") as f:
+                for embed in batch:
+                    f.write(json.dumps(embed.to_dict()) + "\n")
+        except OSError as e:
+            print(f"⚠️ Error al guardar los logs pendientes en {self.spill_file}: {e}")
+            self.counters["dropped"] += len(batch)
+            return
+        self.counters["spilled"] += len(batch)
+
+    def _take_spilled(self):
+        replay_file = f"{self.spill_file}.replay"
+        if os.path.exists(self.spill_file):
+            if os.path.exists(replay_file):
+                # Quedó un reintento a medias (p. ej. el bot se detuvo): se añade detrás, no se pisa.
+                with open(self.spill_file, encoding="utf-8") as src, open(replay_file, 'a', encoding="utf-8") as dst:
+                    dst.write("\n" + src.read())
+                os.remove(self.spill_file)
+            else:
+                os.replace(self.spill_file, replay_file)
+        elif not os.path.exists(replay_file):
+            return []
+        embeds = []
+        with open(replay_file, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    embeds.append(discord.Embed.from_dict(json.loads(line)))
+                except json.JSONDecodeError:
+                    # Una línea cortada al escribir; las demás siguen siendo válidas.
+                    self.counters["dropped"] += 1
+        os.remove(replay_file)
+        return embeds
+
+    async def _replay_spilled(self):
+        embeds = self._take_spilled()
+        for start in range(0, len(embeds), self.batch_size):
+            batch = embeds[start:start + self.batch_size]
+            try:
+                sent = await self._send(batch)
+            except asyncio.CancelledError:
+                # Cancelado por close(): lo que quedaba del fichero vuelve a guardarse.
+                self._spill(embeds[start:])
+                raise
+            if not sent:
+                # _send ya ha vuelto a guardar este lote; el resto se guarda sin intentar enviarlo.
+                self._spill(embeds[start + self.batch_size:])
+                return
+            self.counters["replayed"] += len(batch)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        batch, self._batch = self._batch, []
+        while not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        for start in range(0, len(batch), self.batch_size):
+            try:
+                await self._send(batch[start:start + self.batch_size])
+            except Exception as e:
+                print(f"⚠️ Error inesperado en la cola de logs: {e}")
+                self._spill(batch[start:start + self.batch_size])
+
+    def stats(self):
+        return dict(self.counters, pending=self.queue.qsize())
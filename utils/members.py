@@ -0,0 +1,39 @@
+from collections import OrderedDict
+import discord
+
+
+class MemberCache:
+    def __init__(self, maxsize=1000):
+        self.maxsize = maxsize
+        self.members = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def remember(self, member):
+        key = (member.guild.id, member.id)
+        self.members[key] = member
+        self.members.move_to_end(key)
+        if len(self.members) > self.maxsize:
+            self.members.popitem(last=False)
+
+    async def get(self, guild, user_id):
+        member = guild.get_member(user_id)
+        if member is not None:
+            self.hits += 1
+            return member
+        key = (guild.id, user_id)
+        member = self.members.get(key)
+        if member is not None:
+            self.hits += 1
+            self.members.move_to_end(key)
+            return member
+        self.misses += 1
+        try:
+            member = await guild.fetch_member(user_id)
+        except (discord.NotFound, discord.Forbidden):
+            return None
+        self.remember(member)
+        return member
+
+    def stats(self):
+        return {"size": len(self.members), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,211 @@
+import asyncio
+import bisect
+import contextvars
+import functools
+import logging
+import time
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q):
+        # Aproximación por el límite superior del bucket, suficiente para un resumen.
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class Metrics:
+    def __init__(self):
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.collectors = []
+
+    def inc(self, name, labels=(), value=1):
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, labels=()):
+        self.gauges[(name, labels)] = value
+
+    def observe(self, name, value, labels=()):
+        key = (name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(value)
+
+    def timed(self, name, **labels):
+        def decorator(func):
+            key_labels = tuple(sorted(dict(labels, callback=func.__qualname__).items()))
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    self.inc(f"{name}_errors_total", key_labels)
+                    raise
+                finally:
+                    self.observe(f"{name}_seconds",
+                                 time.perf_counter() - start, key_labels)
+            return wrapper
+        return decorator
+
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    async def collect(self):
+        for collector in self.collectors:
+            try:
+                for name, labels, value in await collector():
+                    self.set(name, value, labels)
+            except Exception as e:
+                print(f"⚠️ Error al recoger métricas: {e}")
+
+    def render(self):
+        lines = []
+        seen = set()
+
+        def header(name, kind):
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(self.counters.items()):
+            header(name, "counter")
+            lines.append(f"{name}{format_labels(labels)} {value}")
+        for (name, labels), value in sorted(self.gauges.items()):
+            header(name, "gauge")
+            lines.append(f"{name}{format_labels(labels)} {value}")
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            header(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    f"{name}_bucket{format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{format_labels(labels)} {histogram.total}")
+            lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+# Método HTTP de la petición en curso, para etiquetar las esperas dentro del bucket de discord.py.
+current_method = contextvars.ContextVar("discord_http_method", default="?")
+
+
+def count_rate_limit(method, wait):
+    metrics.inc("discord_rate_limited_total", (("method", method),))
+    metrics.inc("discord_rate_limit_wait_seconds_total", (("method", method),), wait)
+
+
+def instrument_ratelimit(ratelimit_class):
+    # discord.py espera antes de llegar al 429 cuando un bucket se agota y solo lo registra en DEBUG:
+    # se mide esa espera alrededor de acquire().
+    if getattr(ratelimit_class.acquire, "instrumented", False):
+        return
+    acquire = ratelimit_class.acquire
+
+    async def timed_acquire(self):
+        if self.remaining > 0 or self.is_expired():
+            return await acquire(self)
+        start = time.perf_counter()
+        try:
+            return await acquire(self)
+        finally:
+            count_rate_limit(current_method.get(), time.perf_counter() - start)
+
+    timed_acquire.instrumented = True
+    ratelimit_class.acquire = timed_acquire
+
+
+class RateLimitLogHandler(logging.Handler):
+    def emit(self, record):
+        if isinstance(record.msg, str) and record.msg.startswith("We are being rate limited") and record.args:
+            count_rate_limit(record.args[0], record.args[-1])
+
+
+def instrument_http(http):
+    request = http.request
+
+    async def timed_request(route, **kwargs):
+        labels = (("route", f"{route.method} {route.path}"),)
+        current_method.set(route.method)
+        start = time.perf_counter()
+        try:
+            return await request(route, **kwargs)
+        except Exception:
+            metrics.inc("discord_rest_errors_total", labels)
+            raise
+        finally:
+            metrics.observe("discord_rest_seconds",
+                            time.perf_counter() - start, labels)
+
+    http.request = timed_request
+    logging.getLogger("discord.http").addHandler(RateLimitLogHandler())
+    from discord.http import Ratelimit
+    instrument_ratelimit(Ratelimit)
+
+
+async def monitor_loop_lag(interval=0.5):
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - start - interval)
+        metrics.set("event_loop_lag_seconds", lag)
+        metrics.observe("event_loop_lag_seconds_distribution", lag)
+
+
+async def serve_metrics(host, port):
+    async def handle(reader, writer):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            if request_line.split(b" ")[1:2] == [b"/metrics"]:
+                await metrics.collect()
+                body = metrics.render().encode("utf-8")
+                status = b"200 OK"
+            else:
+                body, status = b"not found\n", b"404 Not Found"
+            writer.write(b"HTTP/1.1 " + status + b"\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                         + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
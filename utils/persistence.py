@@ -0,0 +1,134 @@
+import asyncio
+import collections
+import threading
+import time
+from utils.metrics import metrics
+
+
+class PersistenceWorker:
+    def __init__(self, writer, debounce=0.05, name="persistence"):
+        self.writer = writer
+        self.debounce = debounce
+        self.labels = (("store", name),)
+        self.flushes = 0
+        self.records_written = 0
+        self.last_flush_latency = 0.0
+        self.max_flush_latency = 0.0
+        self.total_flush_latency = 0.0
+        self.max_batch = 0
+        self.errors = 0
+        self._items = collections.deque()
+        self._cond = threading.Condition()
+        self._urgent = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, record):
+        with self._cond:
+            self._items.append(("record", record))
+            self._cond.notify()
+
+    def call(self, job, urgent=False):
+        with self._cond:
+            self._items.append(("job", job))
+            self._urgent = self._urgent or urgent
+            self._cond.notify()
+
+    async def run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve(result=None, error=None):
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+        def job():
+            try:
+                result = fn(*args)
+            except Exception as e:
+                loop.call_soon_threadsafe(resolve, None, e)
+            else:
+                loop.call_soon_threadsafe(resolve, result)
+
+        # Las lecturas y los flush no esperan a la ventana de agrupación.
+        self.call(job, urgent=True)
+        return await future
+
+    async def flush(self):
+        await self.run(lambda: None)
+
+    def flush_sync(self):
+        event = threading.Event()
+        self.call(event.set, urgent=True)
+        event.wait()
+
+    def _take(self):
+        with self._cond:
+            while not self._items:
+                self._cond.wait()
+            if self.debounce:
+                # Esperamos un poco para agrupar las ráfagas de cambios en una sola escritura.
+                deadline = time.monotonic() + self.debounce
+                while not self._urgent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            items = list(self._items)
+            self._items.clear()
+            self._urgent = False
+            return items
+
+    def _run(self):
+        while True:
+            batch = []
+            for kind, item in self._take():
+                if kind == "record":
+                    batch.append(item)
+                    continue
+                self._write(batch)
+                batch = []
+                try:
+                    item()
+                except Exception as e:
+                    self.errors += 1
+                    print(f"⚠️ Error en la tarea de persistencia: {e}")
+            self._write(batch)
+
+    def _write(self, batch):
+        if not batch:
+            return
+        start = time.perf_counter()
+        try:
+            written = self.writer(batch)
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ Error al escribir {len(batch)} registros: {e}")
+            return
+        latency = time.perf_counter() - start
+        self.flushes += 1
+        self.records_written += len(batch)
+        self.last_flush_latency = latency
+        self.total_flush_latency += latency
+        self.max_flush_latency = max(self.max_flush_latency, latency)
+        self.max_batch = max(self.max_batch, len(batch))
+        metrics.observe("persistence_flush_seconds", latency, self.labels)
+        metrics.inc("persistence_records_total", self.labels, len(batch))
+        if written:
+            metrics.inc("persistence_bytes_total", self.labels, written)
+
+    def stats(self):
+        return {
+            "queue_depth": len(self._items),
+            "flushes": self.flushes,
+            "records_written": self.records_written,
+            "max_batch": self.max_batch,
+            "last_flush_ms": self.last_flush_latency * 1000,
+            "avg_flush_ms": self.total_flush_latency * 1000 / self.flushes if self.flushes else 0.0,
+            "max_flush_ms": self.max_flush_latency * 1000,
+            "errors": self.errors,
+        }
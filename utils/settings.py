@@ -0,0 +1,148 @@
+import json
+import os
+import string
+from utils.assignment import STRATEGIES
+from utils.metrics import metrics
+
+DEFAULT_LOCALE = "ES_es"
+
+
+def read_json(file):
+    # A diferencia de load_json, un fichero a medio escribir es un error y no un diccionario vacío.
+    with open(file, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def is_snowflake(value):
+    return str(value).isdigit()
+
+
+def validate_config(config, locales=None):
+    if not isinstance(config, dict):
+        raise ValueError("la configuración debe ser un objeto JSON")
+    errors = []
+    for key in ("ticket_channel_id", "log_channel_id"):
+        if key in config and not is_snowflake(config[key]):
+            errors.append(f"{key} debe ser una ID numérica")
+    categories = config.get("ticket_categories", {})
+    if not isinstance(categories, dict):
+        errors.append("ticket_categories debe ser un objeto")
+        categories = {}
+    for category, category_data in categories.items():
+        if not isinstance(category_data, dict):
+            errors.append(f"ticket_categories.{category} debe ser un objeto")
+            continue
+        for key in ("category_id", "support_role_id"):
+            if not is_snowflake(category_data.get(key)):
+                errors.append(f"ticket_categories.{category}.{key} debe ser una ID numérica")
+        if not isinstance(category_data.get("display_name"), str):
+            errors.append(f"ticket_categories.{category}.display_name es obligatorio")
+        for key in ("reminder_hours", "auto_close_hours", "max_open_tickets", "max_tickets_per_staff"):
+            value = category_data.get(key)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0):
+                errors.append(f"ticket_categories.{category}.{key} debe ser un número positivo")
+        if category_data.get("auto_assign") not in (None,) + STRATEGIES:
+            errors.append(f"ticket_categories.{category}.auto_assign debe ser uno de: {', '.join(STRATEGIES)}")
+        weights = category_data.get("assign_weights", {})
+        if not isinstance(weights, dict) or not all(
+                is_snowflake(staff_id) and not isinstance(weight, bool) and isinstance(weight, (int, float)) and weight > 0
+                for staff_id, weight in weights.items()):
+            errors.append(f"ticket_categories.{category}.assign_weights debe asociar IDs a pesos positivos")
+    if locales is not None and config.get("language", DEFAULT_LOCALE) not in locales:
+        errors.append(f"no existe lang/{config.get('language')}.json")
+    if errors:
+        raise ValueError("; ".join(errors))
+
+
+def placeholders(template):
+    return {field.split(".")[0].split("[")[0]
+            for _, field, _, _ in string.Formatter().parse(template) if field}
+
+
+def compile_catalog(locale, messages, reference):
+    # Las traducciones que faltan o usan campos que el código no pasa se sustituyen por el texto de
+    # referencia: así un error en un idioma nunca llega a un format() dentro de un callback.
+    catalog = {}
+    for key, reference_value in reference.items():
+        value = messages.get(key, reference_value)
+        if isinstance(reference_value, dict):
+            catalog[key] = compile_catalog(
+                locale, value if isinstance(value, dict) else {}, reference_value)
+            continue
+        try:
+            valid = isinstance(value, str) and placeholders(
+                value) <= placeholders(reference_value)
+        except ValueError:
+            valid = False
+        if not valid:
+            print(f"⚠️ Traducción no válida en {locale}: '{key}', se usa la de {DEFAULT_LOCALE}")
+            value = reference_value
+        catalog[key] = value
+    for key, value in messages.items():
+        catalog.setdefault(key, value)
+    return catalog
+
+
+class Settings:
+    def __init__(self, config_file='config.json', lang_dir='lang', poll_interval=2.0):
+        self.config_file = config_file
+        self.lang_dir = lang_dir
+        self.poll_interval = poll_interval
+        self.listeners = []
+        self.reloads = 0
+        self.reload_errors = 0
+        self.mtimes = self._stat()
+        self.config, self.catalogs = self._load()
+
+    @property
+    def lang(self):
+        return self.catalogs.get(self.config.get("language", DEFAULT_LOCALE), self.catalogs[DEFAULT_LOCALE])
+
+    def _files(self):
+        return [self.config_file] + sorted(os.path.join(self.lang_dir, file)
+                                           for file in os.listdir(self.lang_dir) if file.endswith(".json"))
+
+    def _stat(self):
+        mtimes = {}
+        for file in self._files():
+            try:
+                mtimes[file] = os.stat(file).st_mtime_ns
+            except FileNotFoundError:
+                mtimes[file] = None
+        return mtimes
+
+    def _load(self):
+        reference = read_json(os.path.join(
+            self.lang_dir, f"{DEFAULT_LOCALE}.json"))
+        catalogs = {DEFAULT_LOCALE: compile_catalog(
+            DEFAULT_LOCALE, reference, reference)}
+        for file in self._files()[1:]:
+            locale = os.path.basename(file)[:-len(".json")]
+            if locale not in catalogs:
+                catalogs[locale] = compile_catalog(
+                    locale, read_json(file), reference)
+        config = read_json(self.config_file)
+        validate_config(config, catalogs)
+        return config, catalogs
+
+    def reload_if_changed(self):
+        # Un stat por fichero en cada sondeo; solo se vuelve a leer si cambió alguna fecha de modificación.
+        mtimes = self._stat()
+        if mtimes == self.mtimes:
+            return False
+        self.mtimes = mtimes
+        try:
+            config, catalogs = self._load()
+        except (OSError, ValueError) as e:
+            self.reload_errors += 1
+            metrics.inc("config_reloads_total", (("result", "error"),))
+            print(f"⚠️ No se pudo recargar la configuración, se mantiene la anterior: {e}")
+            return False
+        # Sin await de por medio: las interacciones en curso terminan con la versión que ya leyeron.
+        self.config, self.catalogs = config, catalogs
+        self.reloads += 1
+        metrics.inc("config_reloads_total", (("result", "ok"),))
+        for listener in self.listeners:
+            listener(self)
+        print("🔄 Configuración e idiomas recargados")
+        return True
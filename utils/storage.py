@@ -0,0 +1,528 @@
+import asyncio
+import csv
+import json
+import os
+import sqlite3
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from utils.persistence import PersistenceWorker
+from utils.ticket_registry import TICKET_COLUMNS, Ticket, TicketRegistry
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    channel_id INTEGER PRIMARY KEY,
+    name TEXT,
+    opened_by INTEGER,
+    category TEXT,
+    claimed_by INTEGER,
+    opened_at TEXT,
+    guild_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_tickets_opened_by ON tickets (opened_by);
+CREATE INDEX IF NOT EXISTS idx_tickets_claimed_by ON tickets (claimed_by);
+CREATE INDEX IF NOT EXISTS idx_tickets_category ON tickets (category);
+
+CREATE TABLE IF NOT EXISTS closed_tickets (
+    channel_id INTEGER PRIMARY KEY,
+    name TEXT,
+    opened_by INTEGER,
+    category TEXT,
+    claimed_by INTEGER,
+    opened_at TEXT,
+    closed_by INTEGER,
+    closed_at TEXT,
+    guild_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_closed_opened_by ON closed_tickets (opened_by);
+CREATE INDEX IF NOT EXISTS idx_closed_claimed_by ON closed_tickets (claimed_by);
+CREATE INDEX IF NOT EXISTS idx_closed_category ON closed_tickets (category);
+
+-- Última actividad de los usuarios en cada ticket abierto: los mensajes del bot no cuentan.
+CREATE TABLE IF NOT EXISTS ticket_activity (
+    channel_id INTEGER PRIMARY KEY,
+    last_activity REAL NOT NULL,
+    reminded INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS transcripts (
+    ticket_id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    html_path TEXT,
+    message_count INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS bulk_jobs (
+    job_id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    target_id INTEGER,
+    created_by INTEGER,
+    channel_ids TEXT NOT NULL,
+    cursor INTEGER NOT NULL DEFAULT 0,
+    done INTEGER NOT NULL DEFAULT 0,
+    skipped INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'running',
+    progress_channel_id INTEGER,
+    progress_message_id INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS ticket_events (
+    id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    event TEXT NOT NULL,
+    user_id INTEGER,
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_channel ON ticket_events (channel_id, event);
+CREATE INDEX IF NOT EXISTS idx_events_guild_at ON ticket_events (guild_id, at);
+
+CREATE TABLE IF NOT EXISTS ticket_rollups (
+    guild_id INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    staff_id INTEGER NOT NULL,
+    hour INTEGER NOT NULL,
+    opened INTEGER NOT NULL DEFAULT 0,
+    claimed INTEGER NOT NULL DEFAULT 0,
+    released INTEGER NOT NULL DEFAULT 0,
+    users_added INTEGER NOT NULL DEFAULT 0,
+    closed INTEGER NOT NULL DEFAULT 0,
+    claim_wait_sum REAL NOT NULL DEFAULT 0,
+    claim_wait_count INTEGER NOT NULL DEFAULT 0,
+    resolution_sum REAL NOT NULL DEFAULT 0,
+    resolution_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (guild_id, category, staff_id, hour)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_rollups_guild_hour ON ticket_rollups (guild_id, staff_id, hour);
+
+CREATE TABLE IF NOT EXISTS ticket_rollup_buckets (
+    guild_id INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (guild_id, category, metric, hour, bucket)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_rollup_buckets_guild ON ticket_rollup_buckets (guild_id, metric, hour);
+
+CREATE TABLE IF NOT EXISTS duration_buckets (
+    bucket INTEGER PRIMARY KEY,
+    bound REAL NOT NULL
+);
+
+-- Los agregados se actualizan en la misma transacción que el evento, así las estadísticas
+-- solo leen filas por hora y nunca recorren el historial.
+CREATE TRIGGER IF NOT EXISTS rollup_event_counts AFTER INSERT ON ticket_events
+BEGIN
+    INSERT INTO ticket_rollups (guild_id, category, staff_id, hour, opened, claimed, released, users_added, closed)
+    SELECT NEW.guild_id, NEW.category, staff_id, CAST(NEW.at / 3600 AS INTEGER),
+           NEW.event = 'open', NEW.event = 'claim', NEW.event = 'release', NEW.event = 'add_user', NEW.event = 'close'
+    FROM (SELECT 0 AS staff_id
+          UNION ALL SELECT NEW.user_id WHERE NEW.event != 'open' AND NEW.user_id IS NOT NULL)
+    WHERE true
+    ON CONFLICT DO UPDATE SET opened = opened + excluded.opened, claimed = claimed + excluded.claimed,
+        released = released + excluded.released, users_added = users_added + excluded.users_added,
+        closed = closed + excluded.closed;
+END;
+
+CREATE TRIGGER IF NOT EXISTS rollup_event_durations AFTER INSERT ON ticket_events
+WHEN NEW.event = 'close' OR (NEW.event = 'claim' AND NOT EXISTS (
+    SELECT 1 FROM ticket_events WHERE channel_id = NEW.channel_id AND event = 'claim' AND id != NEW.id))
+BEGIN
+    INSERT INTO ticket_rollups (guild_id, category, staff_id, hour,
+                                claim_wait_sum, claim_wait_count, resolution_sum, resolution_count)
+    SELECT NEW.guild_id, NEW.category, staff_id, CAST(NEW.at / 3600 AS INTEGER),
+           CASE WHEN NEW.event = 'claim' THEN duration ELSE 0 END, NEW.event = 'claim',
+           CASE WHEN NEW.event = 'close' THEN duration ELSE 0 END, NEW.event = 'close'
+    FROM (SELECT NEW.at - at AS duration FROM ticket_events
+          WHERE channel_id = NEW.channel_id AND event = 'open' ORDER BY id DESC LIMIT 1),
+         (SELECT 0 AS staff_id UNION ALL SELECT NEW.user_id WHERE NEW.user_id IS NOT NULL)
+    WHERE true
+    ON CONFLICT DO UPDATE SET claim_wait_sum = claim_wait_sum + excluded.claim_wait_sum,
+        claim_wait_count = claim_wait_count + excluded.claim_wait_count,
+        resolution_sum = resolution_sum + excluded.resolution_sum,
+        resolution_count = resolution_count + excluded.resolution_count;
+
+    INSERT INTO ticket_rollup_buckets (guild_id, category, metric, hour, bucket, count)
+    SELECT NEW.guild_id, NEW.category, CASE WHEN NEW.event = 'claim' THEN 'claim_wait' ELSE 'resolution' END,
+           CAST(NEW.at / 3600 AS INTEGER), (SELECT COUNT(*) FROM duration_buckets WHERE bound < duration), 1
+    FROM (SELECT NEW.at - at AS duration FROM ticket_events
+          WHERE channel_id = NEW.channel_id AND event = 'open' ORDER BY id DESC LIMIT 1)
+    WHERE true
+    ON CONFLICT DO UPDATE SET count = count + 1;
+END;
+"""
+
+# Límites (en segundos) de los buckets con los que se calculan los percentiles de duración.
+DURATION_BUCKETS = (60.0, 300.0, 900.0, 1800.0, 3600.0, 7200.0, 14400.0, 28800.0, 43200.0,
+                    86400.0, 172800.0, 259200.0, 604800.0, 1209600.0, 2592000.0)
+
+EVENT_COLUMNS = ("at", "event", "category", "channel_id", "user_id")
+
+BULK_JOB_COLUMNS = ("guild_id", "action", "target_id", "created_by", "channel_ids",
+                    "progress_channel_id", "progress_message_id")
+
+# Se crean después de migrar: las bases anteriores no tienen la columna guild_id.
+GUILD_SCHEMA = """
+CREATE INDEX IF NOT EXISTS idx_tickets_guild_opened_by ON tickets (guild_id, opened_by);
+CREATE INDEX IF NOT EXISTS idx_tickets_guild_category ON tickets (guild_id, category);
+CREATE INDEX IF NOT EXISTS idx_closed_guild_opened_by ON closed_tickets (guild_id, opened_by);
+"""
+
+STATS_MAX = ("max_batch", "last_flush_ms", "max_flush_ms")
+
+
+def load_json(file, default_data=None):
+    try:
+        with open(file, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default_data if default_data is not None else {}
+
+
+def load_legacy_tickets(snapshot_file='tickets.json', journal_file='tickets.journal'):
+    snapshot = load_json(snapshot_file, {})
+    seq = snapshot.get("seq", 0) if "tickets" in snapshot else 0
+    tickets = {key: dict(record) for key, record in snapshot.get(
+        "tickets", snapshot).items()}
+    for file in (f"{journal_file}.old", journal_file):
+        try:
+            with open(file, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    if record["seq"] <= seq:
+                        continue
+                    seq = record["seq"]
+                    if record["op"] == "put":
+                        tickets[record["key"]] = dict(record["value"])
+                    elif record["op"] == "patch" and record["key"] in tickets:
+                        tickets[record["key"]].update(record["value"])
+                    elif record["op"] == "del":
+                        tickets.pop(record["key"], None)
+        except FileNotFoundError:
+            pass
+    return tickets
+
+
+def partition_file(database_file, shard_id):
+    root, ext = os.path.splitext(database_file)
+    return f"{root}.shard{shard_id}{ext}"
+
+
+class TicketStore:
+    def __init__(self, database_file='tickets.db', debounce=0.05, import_legacy=True, name="ticket-store"):
+        self.database_file = database_file
+        new_database = not os.path.exists(database_file)
+        self.conn = sqlite3.connect(
+            database_file, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.executemany("INSERT OR REPLACE INTO duration_buckets VALUES (?, ?)",
+                              enumerate(DURATION_BUCKETS))
+        self._migrate()
+        if new_database and import_legacy:
+            self._import_legacy()
+        # Los tickets abiertos viven en memoria: las lecturas no pasan por el hilo de escritura.
+        self.tickets = TicketRegistry(Ticket(*row) for row in self.conn.execute(
+            f"SELECT {', '.join(TICKET_COLUMNS)} FROM tickets"))
+        self.worker = PersistenceWorker(
+            self._write_batch, debounce=debounce, name=name)
+
+    def _migrate(self):
+        for table in ("tickets", "closed_tickets"):
+            columns = {row["name"] for row in self.conn.execute(
+                f"PRAGMA table_info({table})")}
+            if "guild_id" not in columns:
+                self.conn.execute(
+                    f"ALTER TABLE {table} ADD COLUMN guild_id INTEGER")
+        self.conn.executescript(GUILD_SCHEMA)
+
+    def _import_legacy(self):
+        tickets = load_legacy_tickets()
+        # El formato antiguo no guardaba el servidor; reconcile_tickets lo completa al arrancar.
+        rows = [(int(record["channel_id"]), None, name, record.get("opened_by"), record.get("category"),
+                 record.get("claimed_by"), record.get("opened_at"))
+                for name, record in tickets.items() if record.get("channel_id") is not None]
+        if rows:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO tickets ({', '.join(TICKET_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self.conn.execute("COMMIT")
+            print(f"📦 Importados {len(rows)} tickets desde tickets.json")
+
+    def _write_batch(self, statements):
+        written = sum(len(sql) + sum(len(str(param)) for param in params)
+                      for sql, params in statements)
+        try:
+            self.conn.execute("BEGIN")
+            for sql, params in statements:
+                self.conn.execute(sql, params)
+            self.conn.execute("COMMIT")
+        except sqlite3.Error:
+            self.conn.execute("ROLLBACK")
+            # Reintentamos una a una para no perder el lote entero por una sola sentencia.
+            for sql, params in statements:
+                try:
+                    self.conn.execute(sql, params)
+                except sqlite3.Error as e:
+                    print(f"⚠️ Error al guardar en {self.database_file}: {e}")
+        return written
+
+    def _fetch_one(self, sql, params=()):
+        row = self.conn.execute(sql, params).fetchone()
+        return dict(row) if row else None
+
+    def _fetch_all(self, sql, params=()):
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def for_guild(self, guild_id):
+        return self
+
+    def get(self, channel_id):
+        return self.tickets.get(channel_id)
+
+    def get_open_by_opener(self, guild_id, user_id):
+        return self.tickets.get_by_opener(guild_id, user_id)
+
+    def list_open(self):
+        return list(self.tickets)
+
+    def list_open_in_guild(self, guild_id):
+        return self.tickets.in_guild(guild_id)
+
+    def list_claimed_by(self, guild_id, user_id):
+        return self.tickets.claimed_by(guild_id, user_id)
+
+    def list_by_category(self, guild_id, category):
+        return self.tickets.in_category(guild_id, category)
+
+    async def list_closed_by_opener(self, guild_id, user_id, limit=25):
+        return await self.worker.run(self._fetch_all,
+                                     "SELECT * FROM closed_tickets WHERE guild_id = ? AND opened_by = ? "
+                                     "ORDER BY closed_at DESC LIMIT ?",
+                                     (guild_id, user_id, limit))
+
+    async def get_transcript(self, guild_id, ticket_id):
+        # La transcripción solo se entrega al servidor al que pertenecía el ticket.
+        return await self.worker.run(self._fetch_one,
+                                     "SELECT transcripts.* FROM transcripts JOIN closed_tickets "
+                                     "ON closed_tickets.channel_id = transcripts.ticket_id "
+                                     "WHERE transcripts.ticket_id = ? AND closed_tickets.guild_id = ?",
+                                     (ticket_id, guild_id))
+
+    def count_open_by_category(self):
+        return self.tickets.count_by_category()
+
+    def count_open_in_category(self, guild_id, category):
+        return self.tickets.count_in_category(guild_id, category)
+
+    def count_open(self):
+        return len(self.tickets)
+
+    def open_ticket(self, ticket):
+        self.tickets.add(ticket)
+        self.worker.submit(
+            (f"INSERT OR REPLACE INTO tickets ({', '.join(TICKET_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)", ticket.to_row()))
+
+    def update(self, channel_id, **fields):
+        self.tickets.update(channel_id, **fields)
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        self.worker.submit((f"UPDATE tickets SET {assignments} WHERE channel_id = ?",
+                            (*fields.values(), channel_id)))
+
+    def close_ticket(self, channel_id, closed_by, closed_at):
+        self.tickets.remove(channel_id)
+        columns = ", ".join(TICKET_COLUMNS)
+        self.worker.submit((f"INSERT OR REPLACE INTO closed_tickets ({columns}, closed_by, closed_at) "
+                            f"SELECT {columns}, ?, ? FROM tickets WHERE channel_id = ?",
+                            (closed_by, closed_at, channel_id)))
+        self.worker.submit(
+            ("DELETE FROM tickets WHERE channel_id = ?", (channel_id,)))
+        self.worker.submit(
+            ("DELETE FROM ticket_activity WHERE channel_id = ?", (channel_id,)))
+
+    def set_activity(self, channel_id, last_activity, reminded=False):
+        self.worker.submit(("INSERT OR REPLACE INTO ticket_activity (channel_id, last_activity, reminded) "
+                            "SELECT channel_id, ?, ? FROM tickets WHERE channel_id = ?",
+                            (last_activity, int(reminded), channel_id)))
+
+    async def list_activity(self):
+        rows = await self.worker.run(self._fetch_all, "SELECT * FROM ticket_activity")
+        return {row["channel_id"]: (row["last_activity"], bool(row["reminded"])) for row in rows}
+
+    def record_event(self, channel_id, event, user_id=None, at=None):
+        # El servidor y la categoría salen de la fila del ticket, que debe existir todavía.
+        self.worker.submit(("INSERT INTO ticket_events (guild_id, channel_id, category, event, user_id, at) "
+                            "SELECT guild_id, channel_id, COALESCE(category, ''), ?, ?, ? FROM tickets "
+                            "WHERE channel_id = ? AND guild_id IS NOT NULL",
+                            (event, user_id, time.time() if at is None else at, channel_id)))
+
+    def _rollup_report(self, guild_id, category, since_hour):
+        scope = "guild_id = ? AND hour >= ?" + \
+            (" AND category = ?" if category else "")
+        params = (guild_id, since_hour) + ((category,) if category else ())
+        totals = self._fetch_one(
+            "SELECT COALESCE(SUM(opened), 0) AS opened, COALESCE(SUM(claimed), 0) AS claimed, "
+            "COALESCE(SUM(released), 0) AS released, COALESCE(SUM(users_added), 0) AS users_added, "
+            "COALESCE(SUM(closed), 0) AS closed, COALESCE(SUM(claim_wait_sum), 0) AS claim_wait_sum, "
+            "COALESCE(SUM(claim_wait_count), 0) AS claim_wait_count, COALESCE(SUM(resolution_sum), 0) AS resolution_sum, "
+            f"COALESCE(SUM(resolution_count), 0) AS resolution_count FROM ticket_rollups WHERE staff_id = 0 AND {scope}",
+            params)
+        return {
+            "totals": totals,
+            "categories": self._fetch_all(
+                "SELECT category, SUM(opened) AS opened, SUM(closed) AS closed FROM ticket_rollups "
+                f"WHERE staff_id = 0 AND {scope} GROUP BY category ORDER BY opened DESC", params),
+            "staff": self._fetch_all(
+                "SELECT staff_id, SUM(claimed) AS claimed, SUM(closed) AS closed, SUM(claim_wait_sum) AS claim_wait_sum, "
+                f"SUM(claim_wait_count) AS claim_wait_count FROM ticket_rollups WHERE staff_id != 0 AND {scope} "
+                "GROUP BY staff_id ORDER BY claimed DESC, closed DESC LIMIT 10", params),
+            "hours": self._fetch_all(
+                "SELECT hour % 24 AS hour_of_day, SUM(opened) AS opened FROM ticket_rollups "
+                f"WHERE staff_id = 0 AND {scope} GROUP BY hour_of_day", params),
+            "buckets": self._fetch_all(
+                f"SELECT metric, bucket, SUM(count) AS count FROM ticket_rollup_buckets WHERE {scope} "
+                "GROUP BY metric, bucket", params),
+        }
+
+    async def rollup_report(self, guild_id, category=None, since_hour=0):
+        return await self.worker.run(self._rollup_report, guild_id, category, since_hour)
+
+    def _export_events(self, guild_id, since, path):
+        # Conexión de solo lectura aparte: con WAL no bloquea al hilo de escritura mientras dura la exportación.
+        conn = sqlite3.connect(self.database_file)
+        rows = 0
+        try:
+            cursor = conn.execute(f"SELECT {', '.join(EVENT_COLUMNS)} FROM ticket_events "
+                                  "WHERE guild_id = ? AND at >= ? ORDER BY at", (guild_id, since))
+            with open(path, 'w', newline='', encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(EVENT_COLUMNS)
+                while True:
+                    page = cursor.fetchmany(1000)
+                    if not page:
+                        break
+                    writer.writerows((datetime.fromtimestamp(at, timezone.utc).isoformat(timespec="seconds"), *rest)
+                                     for at, *rest in page)
+                    rows += len(page)
+        finally:
+            conn.close()
+        return rows
+
+    async def export_events(self, guild_id, since, path):
+        await self.worker.flush()
+        return await asyncio.to_thread(self._export_events, guild_id, since, path)
+
+    def _create_bulk_job(self, job):
+        values = tuple(json.dumps(job[column]) if column == "channel_ids" else job.get(column)
+                       for column in BULK_JOB_COLUMNS)
+        return self.conn.execute(f"INSERT INTO bulk_jobs ({', '.join(BULK_JOB_COLUMNS)}) "
+                                 f"VALUES ({', '.join('?' * len(BULK_JOB_COLUMNS))})", values).lastrowid
+
+    async def create_bulk_job(self, job):
+        # Síncrono en el hilo de escritura: el número del trabajo hace falta para poder reanudarlo.
+        return await self.worker.run(self._create_bulk_job, job)
+
+    def update_bulk_job(self, job_id, **fields):
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        self.worker.submit((f"UPDATE bulk_jobs SET {assignments} WHERE job_id = ?",
+                            (*fields.values(), job_id)))
+
+    async def list_bulk_jobs(self, status="running"):
+        jobs = await self.worker.run(self._fetch_all, "SELECT * FROM bulk_jobs WHERE status = ?", (status,))
+        for job in jobs:
+            job["channel_ids"] = json.loads(job["channel_ids"])
+        return jobs
+
+    def add_transcript(self, ticket_id, path, html_path, message_count):
+        self.worker.submit(("INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?, ?)",
+                            (ticket_id, path, html_path, message_count)))
+
+    def queue_depth(self):
+        return self.worker.stats()["queue_depth"]
+
+    async def stats(self):
+        stats = self.worker.stats()
+        stats["open_tickets"] = self.count_open()
+        return stats
+
+    async def flush(self):
+        await self.worker.flush()
+
+    def close(self):
+        self.worker.flush_sync()
+        self.conn.close()
+
+
+class PartitionedTicketStore:
+    def __init__(self, database_file, shard_count, shard_ids=None, debounce=0.05):
+        # Un fichero por shard: cada proceso abre solo los de los shards que atiende.
+        self.shard_count = shard_count
+        self.partitions = {
+            shard_id: TicketStore(partition_file(database_file, shard_id), debounce=debounce,
+                                  import_legacy=False, name=f"ticket-store-{shard_id}")
+            for shard_id in (shard_ids if shard_ids is not None else range(shard_count))}
+
+    def for_guild(self, guild_id):
+        # Misma fórmula que usa Discord para repartir los servidores entre shards.
+        shard_id = (guild_id >> 22) % self.shard_count
+        try:
+            return self.partitions[shard_id]
+        except KeyError:
+            raise LookupError(
+                f"el shard {shard_id} no pertenece a este proceso") from None
+
+    async def _gather(self, method, *args):
+        return await asyncio.gather(*(getattr(store, method)(*args) for store in self.partitions.values()))
+
+    def list_open(self):
+        return [ticket for store in self.partitions.values() for ticket in store.list_open()]
+
+    async def list_bulk_jobs(self, status="running"):
+        return [job for jobs in await self._gather("list_bulk_jobs", status) for job in jobs]
+
+    async def list_activity(self):
+        activity = {}
+        for partition in await self._gather("list_activity"):
+            activity.update(partition)
+        return activity
+
+    def count_open_by_category(self):
+        totals = Counter()
+        for store in self.partitions.values():
+            totals.update(store.count_open_by_category())
+        return dict(totals)
+
+    def count_open(self):
+        return sum(store.count_open() for store in self.partitions.values())
+
+    def queue_depth(self):
+        return sum(store.queue_depth() for store in self.partitions.values())
+
+    async def stats(self):
+        partitions = await self._gather("stats")
+        stats = {}
+        for partition in partitions:
+            for key, value in partition.items():
+                stats[key] = max(stats.get(key, 0), value) if key in STATS_MAX else stats.get(key, 0) + value
+        flushes = stats.get("flushes", 0)
+        stats["avg_flush_ms"] = sum(partition["avg_flush_ms"] * partition["flushes"]
+                                    for partition in partitions) / flushes if flushes else 0.0
+        stats["partitions"] = len(partitions)
+        return stats
+
+    async def flush(self):
+        await self._gather("flush")
+
+    def close(self):
+        for store in self.partitions.values():
+            store.close()
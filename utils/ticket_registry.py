@@ -0,0 +1,129 @@
+import enum
+import sys
+
+TICKET_COLUMNS = ("channel_id", "guild_id", "name", "opened_by",
+                  "category", "claimed_by", "opened_at")
+
+
+class TicketStatus(enum.Enum):
+    OPEN = "open"
+    CLAIMED = "claimed"
+    CLOSED = "closed"
+
+
+class Ticket:
+    # Sin __dict__: cada ticket abierto ocupa lo mismo que una tupla de sus campos.
+    __slots__ = TICKET_COLUMNS + ("status",)
+
+    def __init__(self, channel_id, guild_id, name, opened_by, category, claimed_by=None, opened_at=None):
+        self.channel_id = int(channel_id)
+        self.guild_id = int(guild_id) if guild_id is not None else None
+        self.name = name
+        self.opened_by = int(opened_by) if opened_by is not None else None
+        # Hay pocas categorías y muchos tickets: todos comparten la misma cadena.
+        self.category = sys.intern(category) if category else category
+        self.claimed_by = int(claimed_by) if claimed_by is not None else None
+        self.opened_at = opened_at
+        self.status = TicketStatus.OPEN if self.claimed_by is None else TicketStatus.CLAIMED
+
+    def to_row(self):
+        return tuple(getattr(self, column) for column in TICKET_COLUMNS)
+
+    def __repr__(self):
+        return f"<Ticket {self.channel_id} {self.status.value} guild={self.guild_id} category={self.category}>"
+
+
+def _add(index, key, ticket):
+    bucket = index.get(key)
+    if bucket is None:
+        bucket = index[key] = {}
+    bucket[ticket.channel_id] = ticket
+
+
+def _discard(index, key, channel_id):
+    bucket = index.get(key)
+    if bucket is not None:
+        bucket.pop(channel_id, None)
+        if not bucket:
+            del index[key]
+
+
+class TicketRegistry:
+    def __init__(self, tickets=()):
+        self.by_channel = {}
+        # Índices secundarios: (servidor, clave) -> {channel_id: Ticket}; las claves vacías se borran.
+        self.by_guild = {}
+        self.by_opener = {}
+        self.by_claimer = {}
+        self.by_category = {}
+        for ticket in tickets:
+            self.add(ticket)
+
+    def __len__(self):
+        return len(self.by_channel)
+
+    def __iter__(self):
+        return iter(list(self.by_channel.values()))
+
+    def _index(self, ticket):
+        _add(self.by_guild, ticket.guild_id, ticket)
+        _add(self.by_category, (ticket.guild_id, ticket.category), ticket)
+        if ticket.opened_by is not None:
+            _add(self.by_opener, (ticket.guild_id, ticket.opened_by), ticket)
+        if ticket.claimed_by is not None:
+            _add(self.by_claimer, (ticket.guild_id, ticket.claimed_by), ticket)
+
+    def _unindex(self, ticket):
+        _discard(self.by_guild, ticket.guild_id, ticket.channel_id)
+        _discard(self.by_category, (ticket.guild_id, ticket.category), ticket.channel_id)
+        _discard(self.by_opener, (ticket.guild_id, ticket.opened_by), ticket.channel_id)
+        _discard(self.by_claimer, (ticket.guild_id, ticket.claimed_by), ticket.channel_id)
+
+    def add(self, ticket):
+        self.remove(ticket.channel_id)
+        self.by_channel[ticket.channel_id] = ticket
+        self._index(ticket)
+        return ticket
+
+    def update(self, channel_id, **fields):
+        ticket = self.by_channel.get(channel_id)
+        if ticket is None:
+            return None
+        self._unindex(ticket)
+        for field, value in fields.items():
+            setattr(ticket, field, value)
+        ticket.status = TicketStatus.OPEN if ticket.claimed_by is None else TicketStatus.CLAIMED
+        self._index(ticket)
+        return ticket
+
+    def remove(self, channel_id):
+        ticket = self.by_channel.pop(channel_id, None)
+        if ticket is not None:
+            self._unindex(ticket)
+            ticket.status = TicketStatus.CLOSED
+        return ticket
+
+    def get(self, channel_id):
+        return self.by_channel.get(channel_id)
+
+    def get_by_opener(self, guild_id, user_id):
+        bucket = self.by_opener.get((guild_id, user_id))
+        return next(iter(bucket.values())) if bucket else None
+
+    def in_guild(self, guild_id):
+        return list(self.by_guild.get(guild_id, {}).values())
+
+    def claimed_by(self, guild_id, user_id):
+        return list(self.by_claimer.get((guild_id, user_id), {}).values())
+
+    def in_category(self, guild_id, category):
+        return list(self.by_category.get((guild_id, category), {}).values())
+
+    def count_in_category(self, guild_id, category):
+        return len(self.by_category.get((guild_id, category), ()))
+
+    def count_by_category(self):
+        totals = {}
+        for (_, category), bucket in self.by_category.items():
+            totals[category] = totals.get(category, 0) + len(bucket)
+        return totals
@@ -0,0 +1,86 @@
+import asyncio
+import gzip
+import html
+import json
+import os
+
+PAGE_SIZE = 100
+
+
+def serialize_message(message):
+    return {
+        "id": message.id,
+        "author_id": message.author.id,
+        "author": str(message.author),
+        "created_at": message.created_at.isoformat(),
+        "content": message.content,
+        "attachments": [attachment.url for attachment in message.attachments],
+        "embeds": [embed.to_dict() for embed in message.embeds],
+    }
+
+
+def render_html(transcript_file, html_file):
+    with gzip.open(transcript_file, 'rt', encoding="utf-8") as src, open(html_file, 'w', encoding="utf-8") as dst:
+        dst.write("<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Transcript</title></head><body>\n")
+        for line in src:
+            message = json.loads(line)
+            dst.write(
+                f"<p><small>{html.escape(message['created_at'])}</small> "
+                f"<b>{html.escape(message['author'])}</b>: {html.escape(message['content'])}")
+            for url in message["attachments"]:
+                dst.write(f" <a href=\"{html.escape(url)}\">{html.escape(url)}</a>")
+            dst.write("</p>\n")
+        dst.write("</body></html>\n")
+
+
+class TranscriptArchiver:
+    def __init__(self, ticket_store, directory='transcripts', max_concurrent=2, html=False):
+        self.ticket_store = ticket_store
+        self.directory = directory
+        self.html = html
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        os.makedirs(directory, exist_ok=True)
+
+    async def _write(self, channel, tmp_file):
+        archive = await asyncio.to_thread(gzip.open, tmp_file, 'wt', encoding="utf-8")
+        messages = 0
+        try:
+            page = []
+            async for message in channel.history(limit=None, oldest_first=True):
+                page.append(json.dumps(serialize_message(message)))
+                if len(page) >= PAGE_SIZE:
+                    # Escribimos página a página para que la memoria no crezca con el tamaño del canal.
+                    await asyncio.to_thread(archive.write, "\n".join(page) + "\n")
+                    messages += len(page)
+                    page = []
+            if page:
+                await asyncio.to_thread(archive.write, "\n".join(page) + "\n")
+                messages += len(page)
+        finally:
+            await asyncio.to_thread(archive.close)
+        return messages
+
+    async def archive(self, channel, ticket_id):
+        async with self.semaphore:
+            transcript_file = os.path.join(
+                self.directory, f"{ticket_id}.jsonl.gz")
+            tmp_file = f"{transcript_file}.tmp"
+            try:
+                messages = await self._write(channel, tmp_file)
+                await asyncio.to_thread(os.replace, tmp_file, transcript_file)
+            except BaseException:
+                # Un archivo a medias no debe quedarse en disco ni confundirse con una transcripción.
+                try:
+                    os.remove(tmp_file)
+                except FileNotFoundError:
+                    pass
+                raise
+
+            html_file = None
+            if self.html:
+                html_file = os.path.join(self.directory, f"{ticket_id}.html")
+                await asyncio.to_thread(render_html, transcript_file, html_file)
+
+            self.ticket_store.for_guild(channel.guild.id).add_transcript(
+                ticket_id, transcript_file, html_file, messages)
+            return transcript_file